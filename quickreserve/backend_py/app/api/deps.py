@@ -1,27 +1,65 @@
-from fastapi import Depends, HTTPException
+import hashlib
+import secrets
+import time
+from dataclasses import dataclass
+from uuid import UUID
+
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.db.models import User
+from app.db.models import User, UserRole
 from app.db.session import get_db
 
 bearer = HTTPBearer(auto_error=True)
 
 
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: UUID
+    role: UserRole
+
+
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS, "principal")
+
+
 async def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> Principal:
+    cache_key = hashlib.sha256(creds.credentials.encode()).digest()
+    principal = principal_cache.get(cache_key)
+    if principal:
+        return principal
+
     try:
         payload = decode_access_token(creds.credentials)
-    except ValueError:
+        user_id = UUID(payload.get("sub"))
+    except (ValueError, TypeError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user_id = payload.get("sub")
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+    role = payload.get("role")
+    if role in UserRole.__members__:
+        principal = Principal(id=user_id, role=UserRole(role))
+    else:
+        result = await db.execute(select(User.id, User.role).where(User.id == user_id))
+        row = result.one_or_none()
+        if not row:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal = Principal(id=row.id, role=row.role)
+
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        ttl = min(settings.PRINCIPAL_CACHE_TTL_SECONDS, expires_at - time.time())
+        if ttl > 0:
+            principal_cache.set(cache_key, principal, ttl)
+    return principal
+
+
+def require_admin(x_admin_token: str = Header(default="")) -> None:
+    if not settings.ADMIN_TOKEN or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,29 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+
+Cursor = tuple[datetime, UUID]
+
+
+def encode_cursor(start_time: datetime, item_id: UUID) -> str:
+    raw = f"{start_time.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> Cursor | None:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, item_id = raw.split("|")
+        return datetime.fromisoformat(start_time), UUID(item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(rows: list, limit: int, key) -> str | None:
+    if len(rows) <= limit:
+        return None
+    return encode_cursor(*key(rows[limit - 1]))
@@ -0,0 +1,51 @@
+import time
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import require_admin
+from app.core.config import settings
+from app.schemas.admin import ProfilerStartIn
+from app.services.profiler import (
+    ProfilerConfig,
+    collapsed_stacks,
+    profiler,
+    slow_requests,
+    start_profiling,
+    stop_profiling,
+)
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/profiler")
+async def start_profiler(payload: ProfilerStartIn):
+    config = ProfilerConfig(
+        until=time.time() + min(payload.duration_seconds, settings.PROFILER_MAX_DURATION_SECONDS),
+        sample_rate=payload.sample_rate,
+        interval_ms=payload.interval_ms,
+        slow_ms=payload.slow_ms,
+    )
+    await start_profiling(config, reset=payload.reset)
+    return profiler.status()
+
+
+@router.delete("/profiler")
+async def stop_profiler():
+    await stop_profiling()
+    return profiler.status()
+
+
+@router.get("/profiler")
+async def profiler_status():
+    return profiler.status()
+
+
+@router.get("/profiler/stacks", response_class=PlainTextResponse)
+async def profiler_stacks(route: str | None = Query(None)):
+    return await collapsed_stacks(route)
+
+
+@router.get("/profiler/slow")
+async def profiler_slow(limit: int = Query(50, ge=1, le=500)):
+    return {"items": await slow_requests(limit)}
@@ -20,5 +20,5 @@ async def mock_token(phone: str, name: str, role: UserRole = UserRole.client, db
         await db.commit()
         await db.refresh(user)
 
-    token = create_access_token(str(user.id))
+    token = create_access_token(str(user.id), role=user.role.value)
     return TokenResponse(access_token=token)
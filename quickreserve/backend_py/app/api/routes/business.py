@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
+from app.api.pagination import decode_cursor, next_cursor
 from app.core.sockets import emit_live_status_changed, emit_new_place_added
 from app.db.models import UserRole, Organization, Category, Slot, Booking, BookingStatus
-from app.db.session import get_db
-from app.schemas.business import BusinessRegisterIn, BusinessStatusIn
+from app.db.session import get_db, get_read_db
+from app.schemas.business import BusinessBookingPageOut, BusinessRegisterIn, BusinessStatusIn
+from app.services.geo_index import geo_index
 from app.services.live_status import set_live_status
 
 router = APIRouter(prefix="/business", tags=["business"])
@@ -38,6 +42,7 @@ async def register_business(
     db.add(org)
     await db.commit()
     await db.refresh(org)
+    await geo_index.add(org)
 
     await set_live_status(payload.gis_id, "free", payload.city)
     await emit_new_place_added(
@@ -69,37 +74,50 @@ async def patch_status(
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
-    await set_live_status(payload.gis_id, payload.status, payload.city)
-    await emit_live_status_changed(payload.city, {"gis_id": payload.gis_id, "status": payload.status})
+    await set_live_status(payload.gis_id, payload.status, org.city)
+    await emit_live_status_changed(org.city, {"gis_id": payload.gis_id, "status": payload.status}, org.lat, org.lng)
     return {"ok": True}
 
 
-@router.get("/my-bookings")
+@router.get("/my-bookings", response_model=BusinessBookingPageOut)
 async def my_bookings(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_user),
+    status: list[BookingStatus] = Query([BookingStatus.pending, BookingStatus.confirmed]),
+    start_from: datetime | None = Query(None, alias="from"),
+    until: datetime | None = Query(None, alias="to"),
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
 ):
     if current_user.role != UserRole.business:
         raise HTTPException(status_code=403, detail="Business role required")
 
-    result = await db.execute(
-        select(Booking, Slot)
+    stmt = (
+        select(Booking.id, Booking.status, Slot.id.label("slot_id"), Slot.start_time, Slot.end_time)
         .join(Slot, Booking.slot_id == Slot.id)
         .join(Organization, Slot.place_id == Organization.id)
         .where(Organization.owner_id == current_user.id)
-        .where(Booking.status.in_([BookingStatus.pending, BookingStatus.confirmed]))
-        .order_by(Slot.start_time.asc())
+        .where(Booking.status.in_(status))
     )
+    if start_from is not None:
+        stmt = stmt.where(Slot.start_time >= start_from)
+    if until is not None:
+        stmt = stmt.where(Slot.start_time < until)
+    after = decode_cursor(cursor)
+    if after is not None:
+        stmt = stmt.where(tuple_(Slot.start_time, Booking.id) > tuple_(*after))
+    result = await db.execute(stmt.order_by(Slot.start_time.asc(), Booking.id.asc()).limit(limit + 1))
+    rows = result.all()
 
     items = []
-    for booking, slot in result.all():
+    for row in rows[:limit]:
         items.append(
             {
-                "booking_id": str(booking.id),
-                "slot_id": str(slot.id),
-                "status": booking.status.value,
-                "start_time": slot.start_time,
-                "end_time": slot.end_time,
+                "booking_id": row.id,
+                "slot_id": row.slot_id,
+                "status": row.status.value,
+                "start_time": row.start_time,
+                "end_time": row.end_time,
             }
         )
-    return {"items": items}
+    return {"items": items, "next_cursor": next_cursor(rows, limit, lambda row: (row.start_time, row.id))}
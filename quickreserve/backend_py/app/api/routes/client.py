@@ -1,104 +1,121 @@
+from datetime import datetime
+from itertools import chain
 from uuid import UUID
-from math import radians, sin, cos, asin, sqrt
 
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
+from app.api.pagination import decode_cursor, next_cursor
 from app.db.models import Organization, SlotStatus
-from app.db.session import get_db
-from app.schemas.client import ReserveIn
-from app.services.booking import get_place_slots, reserve_slot_atomic
+from app.db.session import get_db, get_read_db
+from app.schemas.client import NearbyPageOut, ReserveBatchIn, ReserveIn, SlotPageOut
+from app.services.booking import HOLD_MINUTES, get_place_slots, reserve_slot_atomic, reserve_slots_atomic
+from app.services.geo_index import find_nearby_orgs, haversine_km_many, nearest_indices
 from app.services.live_status import get_live_statuses
 from app.services.twogis import search_nearby
 
 router = APIRouter(prefix="/client", tags=["client"])
 
 
-def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    d_lat = radians(lat2 - lat1)
-    d_lon = radians(lon2 - lon1)
-    a = sin(d_lat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(d_lon / 2) ** 2
-    return 2 * 6371 * asin(sqrt(a))
-
-
-@router.get("/map/nearby")
+@router.get("/map/nearby", response_model=NearbyPageOut)
 async def map_nearby(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     lat: float = Query(...),
     lng: float = Query(...),
     radius_km: float = Query(5, ge=0.1, le=20),
     city: str = Query("almaty"),
     category: str | None = Query(default=None),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
 ):
     twogis_items = await search_nearby(city=city, lat=lat, lng=lng, radius_km=radius_km, category=category)
-    org_query = select(Organization).where(Organization.city == city)
-    if category:
-        org_query = org_query.where(Organization.category == category)
-    org_result = await db.execute(org_query)
-    local_orgs = list(org_result.scalars().all())
+    local_orgs = await find_nearby_orgs(db, city=city, lat=lat, lng=lng, radius_km=radius_km, category=category)
 
-    filtered_local = []
-    for org in local_orgs:
-        distance = haversine_km(lat, lng, org.lat, org.lng)
-        if distance <= radius_km:
-            filtered_local.append((org, distance))
+    n_twogis = len(twogis_items)
+    total = n_twogis + len(local_orgs)
+    lats = np.fromiter(chain((item["lat"] for item in twogis_items), (org.lat for org in local_orgs)), float, total)
+    lngs = np.fromiter(chain((item["lng"] for item in twogis_items), (org.lng for org in local_orgs)), float, total)
+    distances = haversine_km_many(lat, lng, lats, lngs)
 
-    gis_ids = [item["gis_id"] for item in twogis_items] + [org.gis_id for org, _ in filtered_local]
-    statuses = await get_live_statuses(gis_ids)
+    in_radius = np.flatnonzero(distances <= radius_km)
+    picked = in_radius[nearest_indices(distances[in_radius], offset + limit)][offset:].tolist()
 
-    merged: list[dict] = []
-    for item in twogis_items:
-        merged.append(
-            {
-                "id": f"2gis:{item['gis_id']}",
-                **item,
-                "live_status": statuses.get(item["gis_id"], "offline"),
-                "source": "2gis",
-                "can_book": False,
-            }
-        )
+    gis_ids = [twogis_items[i]["gis_id"] if i < n_twogis else local_orgs[i - n_twogis].gis_id for i in picked]
+    statuses = await get_live_statuses(city, gis_ids)
 
-    for org, distance in filtered_local:
+    merged: list[dict] = []
+    for i, gis_id in zip(picked, gis_ids, strict=True):
+        distance_km = round(float(distances[i]), 3)
+        if i < n_twogis:
+            merged.append(
+                {
+                    "id": f"2gis:{gis_id}",
+                    **twogis_items[i],
+                    "distance_km": distance_km,
+                    "live_status": statuses.get(gis_id, "offline"),
+                    "source": "2gis",
+                    "can_book": False,
+                }
+            )
+            continue
+
+        org = local_orgs[i - n_twogis]
         merged.append(
             {
                 "id": str(org.id),
-                "gis_id": org.gis_id,
+                "gis_id": gis_id,
                 "name": org.name,
                 "address": None,
                 "lat": org.lat,
                 "lng": org.lng,
                 "rating": None,
-                "distance_km": round(distance, 3),
-                "live_status": statuses.get(org.gis_id, "offline"),
+                "distance_km": distance_km,
+                "live_status": statuses.get(gis_id, "offline"),
                 "source": "local",
                 "can_book": True,
             }
         )
 
-    merged.sort(key=lambda item: item.get("distance_km", 999999))
-    return {"items": merged}
+    return {"items": merged, "total": int(in_radius.size)}
 
 
-@router.get("/place/{place_id}/slots")
-async def place_slots(place_id: UUID, db: AsyncSession = Depends(get_db)):
-    org = await db.execute(select(Organization).where(Organization.id == place_id))
+@router.get("/place/{place_id}/slots", response_model=SlotPageOut)
+async def place_slots(
+    place_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    status: list[SlotStatus] = Query([SlotStatus.available, SlotStatus.pending]),
+    start_from: datetime | None = Query(None, alias="from"),
+    until: datetime | None = Query(None, alias="to"),
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+):
+    org = await db.execute(select(Organization.id).where(Organization.id == place_id))
     if not org.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Place not found")
 
-    slots = await get_place_slots(db, place_id)
+    slots = await get_place_slots(
+        db,
+        place_id,
+        statuses=status,
+        start_from=start_from,
+        until=until,
+        after=decode_cursor(cursor),
+        limit=limit + 1,
+    )
     return {
         "items": [
             {
-                "id": str(slot.id),
+                "id": slot.id,
                 "start_time": slot.start_time,
                 "end_time": slot.end_time,
                 "status": slot.status.value,
             }
-            for slot in slots
-            if slot.status in (SlotStatus.available, SlotStatus.pending)
-        ]
+            for slot in slots[:limit]
+        ],
+        "next_cursor": next_cursor(slots, limit, lambda slot: (slot.start_time, slot.id)),
     }
 
 
@@ -112,5 +129,22 @@ async def reserve_booking(payload: ReserveIn, db: AsyncSession = Depends(get_db)
         "booking_id": str(booking.id),
         "slot_id": str(payload.slot_id),
         "status": booking.status.value,
-        "pending_for_seconds": 300,
+        "pending_for_seconds": HOLD_MINUTES * 60,
+    }
+
+
+@router.post("/booking/reserve-batch")
+async def reserve_booking_batch(
+    payload: ReserveBatchIn, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)
+):
+    bookings = await reserve_slots_atomic(db, slot_ids=payload.slot_ids, client_id=current_user.id)
+    if not bookings:
+        raise HTTPException(status_code=409, detail="Some slots are not available")
+
+    return {
+        "items": [
+            {"booking_id": str(booking.id), "slot_id": str(booking.slot_id), "status": booking.status.value}
+            for booking in bookings
+        ],
+        "pending_for_seconds": HOLD_MINUTES * 60,
     }
@@ -1,13 +1,35 @@
 import uuid
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.models import Organization, Category, CompanyProfile
 from app.db.session import get_db
-from app.schemas.companies import CompanyCreateIn, CompanyCreateOut, CompanySlotsPatchIn
+from app.schemas.companies import (
+    CompanyCreateIn,
+    CompanyCreateOut,
+    CompanyOccupancyOut,
+    CompanyOccupancyPatchIn,
+    CompanySlotsPatchIn,
+)
+from app.services.geo_index import geo_index
 from app.services.live_status import set_live_status
+from app.services.occupancy import (
+    SlotGrid,
+    from_indexes,
+    get_occupancy,
+    is_free,
+    live_status_for,
+    next_free_index,
+    occupied_indexes,
+    replace_occupancy,
+    update_occupancy,
+)
+from app.services.slots import materialize_slots
 
 router = APIRouter(prefix="/companies", tags=["companies"])
 
@@ -38,29 +60,103 @@ async def create_company(payload: CompanyCreateIn, db: AsyncSession = Depends(ge
         occupied_slots=[],
     )
     db.add(profile)
+    await materialize_slots(db, [(org.id, payload.work_start, payload.work_end, payload.slot_duration_minutes)])
     await db.commit()
+    await geo_index.add(org)
     await set_live_status(org.gis_id, "free", payload.city)
 
     return CompanyCreateOut(id=str(org.id))
 
 
-@router.patch("/{company_id}")
-async def patch_company_slots(company_id: str, payload: CompanySlotsPatchIn, db: AsyncSession = Depends(get_db)):
+async def _load_company(db: AsyncSession, company_id: str) -> tuple[uuid.UUID, SlotGrid, str, str]:
     try:
         company_uuid = uuid.UUID(company_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid company id")
 
-    result = await db.execute(select(CompanyProfile).where(CompanyProfile.company_id == company_uuid))
-    profile = result.scalar_one_or_none()
-    if not profile:
+    result = await db.execute(
+        select(CompanyProfile, Organization.gis_id, Organization.city)
+        .join(Organization, Organization.id == CompanyProfile.company_id)
+        .where(CompanyProfile.company_id == company_uuid)
+    )
+    row = result.one_or_none()
+    if not row:
         raise HTTPException(status_code=404, detail="Company not found")
+    profile, gis_id, city = row
+    return company_uuid, SlotGrid.for_profile(profile), gis_id, city
+
+
+def _slot_indexes(grid: SlotGrid, slots: list[str]) -> list[int]:
+    try:
+        return [grid.index(slot) for slot in slots]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _local_now() -> datetime:
+    return datetime.now(ZoneInfo(settings.SLOT_TIMEZONE))
+
+
+def _occupancy_out(company_id: str, day: date, grid: SlotGrid, bits: bytes, now: datetime) -> CompanyOccupancyOut:
+    today = now.date()
+    current = grid.current_index(now) if day == today else None
+    next_free = None
+    if day >= today:
+        next_free = next_free_index(bits, grid, grid.upcoming_index(now) if day == today else 0)
+    return CompanyOccupancyOut(
+        id=company_id,
+        day=day,
+        occupied=[grid.label(index) for index in occupied_indexes(bits)],
+        is_free_now=current is not None and is_free(bits, current),
+        next_free_slot=grid.label(next_free) if next_free is not None else None,
+    )
+
 
-    profile.occupied_slots = payload.occupiedSlots
-    org_result = await db.execute(select(Organization).where(Organization.id == company_uuid))
-    org = org_result.scalar_one_or_none()
+async def _store_legacy_slots(db: AsyncSession, company_id: uuid.UUID, grid: SlotGrid, bits: bytes) -> None:
+    await db.execute(
+        update(CompanyProfile)
+        .where(CompanyProfile.company_id == company_id)
+        .values(occupied_slots=[grid.label(index) for index in occupied_indexes(bits)])
+    )
+
+
+@router.patch("/{company_id}")
+async def patch_company_slots(company_id: str, payload: CompanySlotsPatchIn, db: AsyncSession = Depends(get_db)):
+    company_uuid, grid, gis_id, city = await _load_company(db, company_id)
+    now = _local_now()
+    bits = from_indexes(grid, _slot_indexes(grid, payload.occupiedSlots))
+    await replace_occupancy(db, company_uuid, now.date(), bits)
+    await _store_legacy_slots(db, company_uuid, grid, bits)
     await db.commit()
-    if org:
-        next_status = "busy" if len(payload.occupiedSlots) > 0 else "free"
-        await set_live_status(org.gis_id, next_status, org.city)
+    await set_live_status(gis_id, live_status_for(bits, grid, now), city)
     return {"status": "success", "id": company_id}
+
+
+@router.patch("/{company_id}/occupancy", response_model=CompanyOccupancyOut)
+async def patch_company_occupancy(company_id: str, payload: CompanyOccupancyPatchIn, db: AsyncSession = Depends(get_db)):
+    company_uuid, grid, gis_id, city = await _load_company(db, company_id)
+    now = _local_now()
+    day = payload.day or now.date()
+    bits = await update_occupancy(
+        db,
+        company_uuid,
+        day,
+        grid,
+        occupy=_slot_indexes(grid, payload.occupy),
+        release=_slot_indexes(grid, payload.release),
+    )
+    if day == now.date():
+        await _store_legacy_slots(db, company_uuid, grid, bits)
+    await db.commit()
+    if day == now.date():
+        await set_live_status(gis_id, live_status_for(bits, grid, now), city)
+    return _occupancy_out(company_id, day, grid, bits, now)
+
+
+@router.get("/{company_id}/occupancy", response_model=CompanyOccupancyOut)
+async def get_company_occupancy(company_id: str, day: date | None = None, db: AsyncSession = Depends(get_db)):
+    company_uuid, grid, _gis_id, _city = await _load_company(db, company_id)
+    now = _local_now()
+    day = day or now.date()
+    bits = await get_occupancy(db, company_uuid, day, grid)
+    return _occupancy_out(company_id, day, grid, bits, now)
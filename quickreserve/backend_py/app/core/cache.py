@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from app.core.metrics import registry
+
+_named: dict[str, TTLCache] = {}
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, name: str | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        if name:
+            _named[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def _cache_stat(stat: str) -> list[tuple[tuple, float]]:
+    return [((name,), cache.stats()[stat]) for name, cache in _named.items()]
+
+
+for metric, stat, kind, documentation in (
+    ("cache_entries", "size", "gauge", "Entries held by each named in-process cache."),
+    ("cache_hits_total", "hits", "counter", "Lookups that found a live entry."),
+    ("cache_misses_total", "misses", "counter", "Lookups that found no entry or an expired one."),
+    ("cache_evictions_total", "evictions", "counter", "Entries dropped to stay within the size limit."),
+):
+    registry.callback(metric, documentation, kind, ("cache",), lambda stat=stat: _cache_stat(stat))
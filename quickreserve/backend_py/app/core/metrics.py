@@ -0,0 +1,215 @@
+import bisect
+import time
+from collections.abc import Callable, Iterable, Iterator
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+Sample = tuple[str, tuple[tuple[str, str], ...], float]
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: tuple[tuple[str, str], ...], value: float) -> str:
+    if labels:
+        name += "{" + ",".join(f'{key}="{_escape(val)}"' for key, val in labels) + "}"
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return f"{name} {int(value)}"
+    return f"{name} {value!r}"
+
+
+class Metric:
+    kind = "untyped"
+    shared = False
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def samples(self) -> Iterator[Sample]:
+        return iter(())
+
+    def render(self, samples: Iterable[Sample] | None = None) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(_format_sample(*sample) for sample in (self.samples() if samples is None else samples))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self._values.items():
+            yield self.name, tuple(zip(self.labelnames, labels)), value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._series: dict[tuple, list[float]] = {}
+
+    def _get_series(self, labels: tuple) -> list[float]:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        return series
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels) or self._get_series(labels)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def bucket_index(self, value: float) -> int:
+        return bisect.bisect_left(self.buckets, value)
+
+    def load(self, labels: tuple, counts: list[int], total: float) -> None:
+        series = self._get_series(labels)
+        series[: len(counts)] = counts
+        series[-1] = total
+
+    def clear(self) -> None:
+        self._series.clear()
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, series in self._series.items():
+            base = tuple(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket", (*base, ("le", repr(float(bound)))), cumulative
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket", (*base, ("le", "+Inf")), cumulative
+            yield f"{self.name}_sum", base, series[-1]
+            yield f"{self.name}_count", base, cumulative
+
+
+class CallbackMetric(Metric):
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: tuple[str, ...],
+        collect: Callable[[], Iterable[tuple[tuple, float]]],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._collect = collect
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self._collect():
+            yield self.name, tuple(zip(self.labelnames, labels)), value
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        shared: bool = False,
+    ) -> Histogram:
+        metric = self.register(Histogram(name, documentation, labelnames, buckets))
+        metric.shared = shared
+        return metric
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: tuple[str, ...],
+        collect: Callable[[], Iterable[tuple[tuple, float]]],
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, kind, labelnames, collect))
+
+    def snapshot(self) -> dict[str, list[Sample]]:
+        return {name: list(metric.samples()) for name, metric in self._metrics.items() if not metric.shared}
+
+    def render(self, merged: dict[str, list[Sample]] | None = None) -> str:
+        lines: list[str] = []
+        for name, metric in self._metrics.items():
+            if merged is None or metric.shared:
+                lines.extend(metric.render())
+            else:
+                lines.extend(metric.render(merged.get(name, ())))
+        return "\n".join(lines) + "\n"
+
+
+def merge_snapshots(snapshots: Iterable[dict[str, list]]) -> dict[str, list[Sample]]:
+    totals: dict[str, dict[tuple, float]] = {}
+    for snapshot in snapshots:
+        for name, samples in snapshot.items():
+            series = totals.setdefault(name, {})
+            for sample_name, labels, value in samples:
+                key = (sample_name, tuple(tuple(pair) for pair in labels))
+                series[key] = series.get(key, 0.0) + value
+    return {name: [(*key, value) for key, value in series.items()] for name, series in totals.items()}
+
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
@@ -4,9 +4,11 @@ from jose import JWTError, jwt
 from app.core.config import settings
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, role: str | None = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
     payload = {"sub": subject, "exp": expire}
+    if role and settings.JWT_INCLUDE_ROLE:
+        payload["role"] = role
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
 
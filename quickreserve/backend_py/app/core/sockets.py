@@ -1,14 +1,140 @@
+import asyncio
+import math
+import time
+
 import socketio
 
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+def _client_manager() -> socketio.AsyncManager:
+    if settings.SOCKETIO_MESSAGE_QUEUE:
+        return socketio.AsyncRedisManager(settings.SOCKETIO_MESSAGE_QUEUE)
+    return socketio.AsyncManager()
+
+
+sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*", client_manager=_client_manager())
+
+socket_emit_seconds = registry.histogram("socketio_emit_duration_seconds", "Socket.IO emit latency.", ("event",))
+
+
+def _room_members() -> dict:
+    return sio.manager.rooms.get("/", {})
+
+
+def _room_clients() -> list[tuple[tuple, float]]:
+    samples = []
+    tile_members = 0
+    for room, members in _room_members().items():
+        if not isinstance(room, str):
+            continue
+        if room.startswith("city:"):
+            samples.append(((room,), len(members)))
+        elif room.startswith("tile:"):
+            tile_members += len(members)
+    samples.append((("tile:*",), tile_members))
+    return samples
+
+
+registry.callback(
+    "socketio_connected_clients",
+    "Clients connected to this worker.",
+    "gauge",
+    (),
+    lambda: [((), len(_room_members().get(None, ())))],
+)
+registry.callback(
+    "socketio_room_clients",
+    "Clients per city room, with all tile room subscriptions summed under tile:*.",
+    "gauge",
+    ("room",),
+    _room_clients,
+)
+registry.callback(
+    "socketio_tile_rooms",
+    "Tile rooms with at least one subscriber.",
+    "gauge",
+    (),
+    lambda: [((), sum(1 for room in _room_members() if isinstance(room, str) and room.startswith("tile:")))],
+)
+
+
+async def _timed_emit(event: str, payload: dict, rooms: list[str]) -> None:
+    started = time.perf_counter()
+    try:
+        await sio.emit(event, payload, to=rooms)
+    finally:
+        socket_emit_seconds.observe(time.perf_counter() - started, event)
+
+
+def tile_room(lat: float, lng: float) -> str:
+    size = settings.SOCKET_TILE_DEG
+    return f"tile:{math.floor(lat / size)}:{math.floor(lng / size)}"
+
+
+def viewport_rooms(south: float, west: float, north: float, east: float) -> set[str] | None:
+    size = settings.SOCKET_TILE_DEG
+    rows = range(math.floor(min(south, north) / size), math.floor(max(south, north) / size) + 1)
+    cols = range(math.floor(min(west, east) / size), math.floor(max(west, east) / size) + 1)
+    if len(rows) * len(cols) > settings.SOCKET_VIEWPORT_MAX_TILES:
+        return None
+    return {f"tile:{row}:{col}" for row in rows for col in cols}
+
+
+def place_rooms(city: str, lat: float | None, lng: float | None) -> list[str]:
+    if lat is None or lng is None:
+        return [f"city:{city}"]
+    return [f"city:{city}", tile_room(lat, lng)]
+
+
+class StatusCoalescer:
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self.batches_sent = 0
+        self.changes_received = 0
+        self._pending: dict[str, dict[str, dict]] = {}
+        self._timers: dict[str, asyncio.Task] = {}
+
+    async def add(self, rooms: list[str], payload: dict) -> None:
+        self.changes_received += 1
+        for room in rooms:
+            self._pending.setdefault(room, {})[payload["gis_id"]] = payload
+            if self.window_seconds <= 0:
+                await self._flush(room)
+            elif room not in self._timers:
+                self._timers[room] = asyncio.create_task(self._flush_later(room))
+
+    async def _flush_later(self, room: str) -> None:
+        await asyncio.sleep(self.window_seconds)
+        self._timers.pop(room, None)
+        await self._flush(room)
+
+    async def _flush(self, room: str) -> None:
+        items = list(self._pending.pop(room, {}).values())
+        if items:
+            self.batches_sent += 1
+            await _timed_emit("live_status_batch", {"items": items}, [room])
+
+    async def flush_all(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for room in list(self._pending):
+            await self._flush(room)
+
+
+status_coalescer = StatusCoalescer(settings.LIVE_STATUS_BATCH_WINDOW_MS / 1000)
 
 
 async def emit_new_place_added(city: str, payload: dict) -> None:
-    await sio.emit("new_place_added", payload, room=f"city:{city}")
+    await _timed_emit("new_place_added", payload, place_rooms(city, payload.get("lat"), payload.get("lng")))
 
 
-async def emit_live_status_changed(city: str, payload: dict) -> None:
-    await sio.emit("live_status_changed", payload, room=f"city:{city}")
+async def emit_live_status_changed(
+    city: str, payload: dict, lat: float | None = None, lng: float | None = None
+) -> None:
+    await status_coalescer.add(place_rooms(city, lat, lng), payload)
 
 
 @sio.event
@@ -23,6 +149,28 @@ async def subscribe_city(sid, data):
         await sio.enter_room(sid, f"city:{city}")
 
 
+@sio.event
+async def subscribe_viewport(sid, data):
+    data = data or {}
+    try:
+        target = viewport_rooms(
+            float(data["south"]), float(data["west"]), float(data["north"]), float(data["east"])
+        )
+    except (KeyError, TypeError, ValueError):
+        return {"ok": False, "error": "south, west, north and east are required"}
+    if target is None:
+        city = data.get("city")
+        if not city:
+            return {"ok": False, "error": "viewport too large"}
+        target = {f"city:{city}"}
+    current = {room for room in sio.rooms(sid) if room.startswith(("tile:", "city:"))}
+    for room in current - target:
+        await sio.leave_room(sid, room)
+    for room in target - current:
+        await sio.enter_room(sid, room)
+    return {"ok": True, "rooms": len(target)}
+
+
 @sio.event
 async def disconnect(_sid):
     return
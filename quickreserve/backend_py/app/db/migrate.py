@@ -0,0 +1,38 @@
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from app.db import models  # noqa: F401
+from app.db.base import Base
+from app.db.session import dispose_engines, get_engine
+from app.services.live_status import drop_legacy_status_keys
+from app.services.redis_client import BREAKER_ERRORS, close_redis
+
+logger = logging.getLogger(__name__)
+
+ADDED_COLUMNS = ("ALTER TABLE slots ADD COLUMN IF NOT EXISTS generated BOOLEAN NOT NULL DEFAULT false",)
+
+
+async def migrate() -> None:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in ADDED_COLUMNS:
+            await conn.execute(text(statement))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                await conn.execute(CreateIndex(index, if_not_exists=True))
+    await dispose_engines()
+    try:
+        logger.info("Dropped %d legacy live:status:* keys", await drop_legacy_status_keys())
+    except BREAKER_ERRORS:
+        logger.warning("Redis unavailable, legacy live:status:* keys were not dropped")
+    finally:
+        await close_redis()
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    logger.setLevel(logging.INFO)
+    asyncio.run(migrate())
@@ -1,8 +1,8 @@
 import enum
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import String, DateTime, Boolean, Enum, ForeignKey, Float, UniqueConstraint, JSON, Integer
+from sqlalchemy import String, DateTime, Date, Boolean, Enum, ForeignKey, Float, UniqueConstraint, JSON, Integer, Index, LargeBinary, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -60,6 +60,10 @@ class Organization(Base):
 
     slots: Mapped[list["Slot"]] = relationship(back_populates="organization", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_organizations_city_lat_lng", "city", "lat", "lng"),
+    )
+
 
 class Slot(Base):
     __tablename__ = "slots"
@@ -70,11 +74,18 @@ class Slot(Base):
     end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     status: Mapped[SlotStatus] = mapped_column(Enum(SlotStatus, name="slot_status"), default=SlotStatus.available, index=True)
     pending_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    generated: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"))
 
     organization: Mapped[Organization] = relationship(back_populates="slots")
 
     __table_args__ = (
         UniqueConstraint("place_id", "start_time", name="uq_place_start_time"),
+        Index("ix_slots_place_status_start", "place_id", "status", "start_time"),
+        Index(
+            "ix_slots_pending_until",
+            "pending_until",
+            postgresql_where=text("status = 'pending'"),
+        ),
     )
 
 
@@ -106,3 +117,15 @@ class CompanyProfile(Base):
     slot_duration_minutes: Mapped[int] = mapped_column(Integer, default=60)
     services: Mapped[list] = mapped_column(JSON, default=list)
     occupied_slots: Mapped[list] = mapped_column(JSON, default=list)
+
+
+class CompanyOccupancy(Base):
+    __tablename__ = "company_occupancy"
+
+    company_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    bits: Mapped[bytes] = mapped_column(LargeBinary)
@@ -1,14 +1,146 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy import create_engine
+import time
+from collections.abc import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import registry
+
+db_query_seconds = registry.histogram("db_query_duration_seconds", "SQL statement latency.", ("pool", "statement"))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def _instrument(engine: AsyncEngine, name: str) -> AsyncEngine:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        started = conn.info["query_started"].pop()
+        db_query_seconds.observe(time.perf_counter() - started, name, statement.split(None, 1)[0].upper())
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _error(context) -> None:
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    return engine
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return _instrument(engine, name)
+
+
+_engines: dict[str, AsyncEngine] = {}
+
+
+def get_engine(name: str = "primary") -> AsyncEngine:
+    if name == "read" and not settings.DATABASE_READ_URL:
+        name = "primary"
+    engine = _engines.get(name)
+    if engine is None:
+        url = settings.DATABASE_READ_URL if name == "read" else settings.DATABASE_URL
+        engine = _engines[name] = _create_engine(url, name)
+    return engine
 
-async_engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
-sync_engine = create_engine(settings.DATABASE_SYNC_URL, pool_pre_ping=True)
+class LazySessionMaker:
+    def __init__(self, engine_name: str) -> None:
+        self.engine_name = engine_name
+        self._factory: async_sessionmaker[AsyncSession] | None = None
+
+    def __call__(self, **kwargs) -> AsyncSession:
+        if self._factory is None:
+            self._factory = async_sessionmaker(get_engine(self.engine_name), class_=AsyncSession, expire_on_commit=False)
+        return self._factory(**kwargs)
+
+
+AsyncSessionLocal = LazySessionMaker("primary")
+AsyncReadSessionLocal = LazySessionMaker("read")
 
 
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db() -> AsyncSession:
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+def engines() -> dict[str, AsyncEngine]:
+    return dict(_engines)
+
+
+def pool_stats() -> dict[str, dict[str, float]]:
+    stats = {}
+    for name, engine in engines().items():
+        pool = engine.sync_engine.pool
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts": pool.checkouts,
+            "wait_ms_total": round(pool.wait_seconds_total * 1000, 3),
+            "wait_ms_max": round(pool.wait_seconds_max * 1000, 3),
+        }
+    return stats
+
+
+async def dispose_engines() -> None:
+    for engine in engines().values():
+        await engine.dispose()
+
+
+def _pool_metric(name: str, documentation: str, kind: str, read: Callable[[InstrumentedPool], float]) -> None:
+    registry.callback(
+        name,
+        documentation,
+        kind,
+        ("pool",),
+        lambda: [((pool_name,), read(engine.sync_engine.pool)) for pool_name, engine in engines().items()],
+    )
+
+
+_pool_metric("db_pool_size", "Configured pool size.", "gauge", lambda pool: pool.size())
+_pool_metric("db_pool_checked_out", "Connections currently in use.", "gauge", lambda pool: pool.checkedout())
+_pool_metric("db_pool_overflow", "Connections opened beyond pool_size.", "gauge", lambda pool: max(pool.overflow(), 0))
+_pool_metric("db_pool_checkouts_total", "Connection checkouts.", "counter", lambda pool: pool.checkouts)
+_pool_metric(
+    "db_pool_checkout_wait_seconds_total", "Time spent waiting for a connection.", "counter", lambda pool: pool.wait_seconds_total
+)
+_pool_metric(
+    "db_pool_checkout_wait_seconds_max", "Longest single checkout wait.", "gauge", lambda pool: pool.wait_seconds_max
+)
@@ -1,19 +1,51 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import socketio
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, PlainTextResponse
 
-from app.api.routes import auth, business, client, companies
+from app.api.routes import admin, auth, business, client, companies
 from app.core.config import settings
-from app.core.sockets import sio
-from app.db.base import Base
-from app.db import models  # noqa: F401
-from app.db.session import async_engine
-
-app = FastAPI(title=settings.APP_NAME)
+from app.core.metrics import MetricsMiddleware
+from app.core.sockets import sio, status_coalescer
+from app.db.session import dispose_engines, pool_stats
+from app.services.geo_index import start_geo_listener, stop_geo_listener
+from app.services.holds import start_hold_poller, stop_hold_poller
+from app.services.live_status import start_invalidation_listener, stop_invalidation_listener
+from app.services.metrics_share import render_all_workers, start_metrics_publisher, stop_metrics_publisher
+from app.services.profiler import ProfilerMiddleware, start_profiler_listener, stop_profiler_listener
+from app.services.redis_client import close_redis
+from app.services.twogis import twogis_client
+from app.workers.runtime import load_celery_metrics
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    start_invalidation_listener()
+    start_geo_listener()
+    start_hold_poller()
+    start_profiler_listener()
+    start_metrics_publisher()
+    yield
+    await status_coalescer.flush_all()
+    await stop_metrics_publisher()
+    await stop_hold_poller()
+    await stop_profiler_listener()
+    await stop_invalidation_listener()
+    await stop_geo_listener()
+    await twogis_client.close()
+    await close_redis()
+    await dispose_engines()
+
+
+app = FastAPI(
+    title=settings.APP_NAME,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -21,25 +53,36 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilerMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router, prefix=settings.API_PREFIX)
 app.include_router(business.router, prefix=settings.API_PREFIX)
 app.include_router(client.router, prefix=settings.API_PREFIX)
 app.include_router(companies.router)
+app.include_router(admin.router, prefix=settings.API_PREFIX)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 
-@app.on_event("startup")
-async def on_startup() -> None:
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-
 @app.get("/health")
 async def health() -> dict:
     return {"ok": True, "service": "tutfree-fastapi"}
 
 
+@app.get("/health/db")
+async def health_db() -> dict:
+    return {"pools": pool_stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    await load_celery_metrics()
+    return PlainTextResponse(await render_all_workers(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/")
 async def root() -> dict:
     return {
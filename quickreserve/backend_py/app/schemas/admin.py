@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilerStartIn(BaseModel):
+    duration_seconds: int = Field(default=60, ge=1)
+    sample_rate: float = Field(default=1.0, gt=0, le=1)
+    interval_ms: float = Field(default=5.0, ge=1, le=1000)
+    slow_ms: float = Field(default=500.0, ge=0)
+    reset: bool = True
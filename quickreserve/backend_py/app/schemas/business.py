@@ -24,3 +24,8 @@ class BusinessBookingOut(BaseModel):
     status: str
     start_time: datetime
     end_time: datetime
+
+
+class BusinessBookingPageOut(BaseModel):
+    items: list[BusinessBookingOut]
+    next_cursor: str | None = None
@@ -1,6 +1,6 @@
 from datetime import datetime
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class NearbyQuery(BaseModel):
@@ -15,6 +15,10 @@ class ReserveIn(BaseModel):
     slot_id: UUID
 
 
+class ReserveBatchIn(BaseModel):
+    slot_ids: list[UUID] = Field(min_length=1, max_length=10)
+
+
 class SlotOut(BaseModel):
     id: UUID
     start_time: datetime
@@ -22,11 +26,25 @@ class SlotOut(BaseModel):
     status: str
 
 
+class SlotPageOut(BaseModel):
+    items: list[SlotOut]
+    next_cursor: str | None = None
+
+
 class PlaceNearbyOut(BaseModel):
+    id: str
     gis_id: str
     name: str
     address: str | None = None
     lat: float
     lng: float
     rating: float | None = None
+    distance_km: float
     live_status: str
+    source: str
+    can_book: bool
+
+
+class NearbyPageOut(BaseModel):
+    items: list[PlaceNearbyOut]
+    total: int
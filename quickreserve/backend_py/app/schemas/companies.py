@@ -1,3 +1,5 @@
+from datetime import date
+
 from pydantic import BaseModel, Field
 
 
@@ -27,3 +29,18 @@ class CompanyCreateOut(BaseModel):
 
 class CompanySlotsPatchIn(BaseModel):
     occupiedSlots: list[str] = Field(default_factory=list)
+
+
+class CompanyOccupancyPatchIn(BaseModel):
+    day: date | None = None
+    occupy: list[str] = Field(default_factory=list)
+    release: list[str] = Field(default_factory=list)
+
+
+class CompanyOccupancyOut(BaseModel):
+    id: str
+    day: date
+    occupied: list[str]
+    is_free_now: bool
+    next_free_slot: str | None = None
+    status: str = "success"
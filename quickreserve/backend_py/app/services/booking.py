@@ -1,41 +1,129 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from sqlalchemy import update, insert, select
+from sqlalchemy import update, insert, select, func, literal, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Slot, SlotStatus, Booking, BookingStatus
+from app.services.holds import claim_slots, register_holds, release_claims
 
+HOLD_MINUTES = 5
 
-async def reserve_slot_atomic(db: AsyncSession, slot_id: UUID, client_id: UUID) -> Booking | None:
-    pending_until = datetime.now(timezone.utc) + timedelta(minutes=5)
 
-    stmt = (
+def _booking_from_row(row, client_id: UUID) -> Booking:
+    return Booking(id=row.id, slot_id=row.slot_id, client_id=client_id, status=row.status, created_at=row.created_at)
+
+
+async def reserve_slot_atomic(db: AsyncSession, slot_id: UUID, client_id: UUID) -> Booking | None:
+    now = datetime.now(timezone.utc)
+    pending_until = now + timedelta(minutes=HOLD_MINUTES)
+    held = (
         update(Slot)
         .where(Slot.id == slot_id, Slot.status == SlotStatus.available)
         .values(status=SlotStatus.pending, pending_until=pending_until)
-        .execution_options(synchronize_session=False)
+        .returning(Slot.id)
+        .cte("held")
+    )
+    stmt = (
+        insert(Booking)
+        .from_select(
+            ["id", "slot_id", "client_id", "status", "created_at"],
+            select(
+                literal(uuid.uuid4(), Booking.id.type),
+                held.c.id,
+                literal(client_id, Booking.client_id.type),
+                literal(BookingStatus.pending, Booking.status.type),
+                literal(now, Booking.created_at.type),
+            ),
+        )
+        .returning(Booking.id, Booking.slot_id, Booking.status, Booking.created_at)
     )
-    result = await db.execute(stmt)
-    if result.rowcount != 1:
-        await db.rollback()
+    if not await claim_slots([slot_id], client_id, HOLD_MINUTES * 60):
         return None
+    try:
+        result = await db.execute(stmt)
+        row = result.one_or_none()
+        if row is None:
+            await db.rollback()
+            await release_claims([slot_id])
+            return None
+        await db.commit()
+    except BaseException:
+        await release_claims([slot_id])
+        raise
+
+    await register_holds([row.slot_id], pending_until)
+    return _booking_from_row(row, client_id)
 
-    booking = Booking(
-        slot_id=slot_id,
-        client_id=client_id,
-        status=BookingStatus.pending,
+
+async def reserve_slots_atomic(db: AsyncSession, slot_ids: list[UUID], client_id: UUID) -> list[Booking] | None:
+    slot_ids = sorted(set(slot_ids))
+    now = datetime.now(timezone.utc)
+    pending_until = now + timedelta(minutes=HOLD_MINUTES)
+    locked = (
+        select(Slot.id)
+        .where(Slot.id.in_(slot_ids), Slot.status == SlotStatus.available)
+        .order_by(Slot.id)
+        .with_for_update()
+        .cte("locked")
+    )
+    held = (
+        update(Slot)
+        .where(Slot.id == locked.c.id)
+        .values(status=SlotStatus.pending, pending_until=pending_until)
+        .returning(Slot.id)
+        .cte("held")
     )
-    db.add(booking)
-    await db.commit()
-    await db.refresh(booking)
-    return booking
+    stmt = (
+        insert(Booking)
+        .from_select(
+            ["id", "slot_id", "client_id", "status", "created_at"],
+            select(
+                func.gen_random_uuid(),
+                held.c.id,
+                literal(client_id, Booking.client_id.type),
+                literal(BookingStatus.pending, Booking.status.type),
+                literal(now, Booking.created_at.type),
+            ),
+        )
+        .returning(Booking.id, Booking.slot_id, Booking.status, Booking.created_at)
+    )
+    if not await claim_slots(slot_ids, client_id, HOLD_MINUTES * 60):
+        return None
+    try:
+        result = await db.execute(stmt)
+        rows = result.all()
+        if len(rows) != len(slot_ids):
+            await db.rollback()
+            await release_claims(slot_ids)
+            return None
+        await db.commit()
+    except BaseException:
+        await release_claims(slot_ids)
+        raise
+
+    await register_holds([row.slot_id for row in rows], pending_until)
+    return sorted((_booking_from_row(row, client_id) for row in rows), key=lambda booking: booking.slot_id)
 
 
-async def get_place_slots(db: AsyncSession, place_id: UUID) -> list[Slot]:
-    result = await db.execute(
-        select(Slot)
-        .where(Slot.place_id == place_id, Slot.start_time >= datetime.now(timezone.utc))
-        .order_by(Slot.start_time.asc())
+async def get_place_slots(
+    db: AsyncSession,
+    place_id: UUID,
+    statuses: list[SlotStatus],
+    start_from: datetime | None = None,
+    until: datetime | None = None,
+    after: tuple[datetime, UUID] | None = None,
+    limit: int = 50,
+) -> list[Slot]:
+    stmt = select(Slot).where(
+        Slot.place_id == place_id,
+        Slot.status.in_(statuses),
+        Slot.start_time >= (start_from or datetime.now(timezone.utc)),
     )
+    if until is not None:
+        stmt = stmt.where(Slot.start_time < until)
+    if after is not None:
+        stmt = stmt.where(tuple_(Slot.start_time, Slot.id) > tuple_(*after))
+    result = await db.execute(stmt.order_by(Slot.start_time.asc(), Slot.id.asc()).limit(limit))
     return list(result.scalars().all())
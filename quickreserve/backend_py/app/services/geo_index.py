@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from math import cos, floor, radians
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Category, Organization
+from app.db.session import AsyncReadSessionLocal
+from app.services.redis_client import redis_call, subscribe_forever
+
+KM_PER_DEG_LAT = 111.32
+EARTH_RADIUS_KM = 6371.0
+ADDED_CHANNEL = "geo:added"
+
+_listener: asyncio.Task | None = None
+
+BBox = tuple[float, float, float, float]
+
+
+@dataclass(frozen=True, slots=True)
+class GeoPoint:
+    id: UUID
+    gis_id: str
+    name: str
+    category: str
+    lat: float
+    lng: float
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> BBox:
+    d_lat = radius_km / KM_PER_DEG_LAT
+    d_lng = radius_km / (KM_PER_DEG_LAT * max(cos(radians(lat)), 0.01))
+    return lat - d_lat, lat + d_lat, lng - d_lng, lng + d_lng
+
+
+def haversine_km_many(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    d_lat = lat2 - lat1
+    d_lng = np.radians(lngs - lng)
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(d_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearest_indices(distances: np.ndarray, k: int) -> np.ndarray:
+    if k <= 0 or distances.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < distances.size:
+        picked = np.argpartition(distances, k - 1)[:k]
+    else:
+        picked = np.arange(distances.size)
+    return picked[np.argsort(distances[picked], kind="stable")]
+
+
+def _point_select():
+    return select(
+        Organization.id,
+        Organization.gis_id,
+        Organization.name,
+        Organization.category,
+        Organization.lat,
+        Organization.lng,
+    )
+
+
+def point_from_org(org: Organization) -> GeoPoint:
+    return GeoPoint(id=org.id, gis_id=org.gis_id, name=org.name, category=org.category, lat=org.lat, lng=org.lng)
+
+
+class CityGrid:
+    def __init__(self, cell_deg: float) -> None:
+        self.cell_deg = cell_deg
+        self.loaded_at = time.monotonic()
+        self._cells: dict[tuple[int, int], dict[str, GeoPoint]] = {}
+        self._cell_of: dict[str, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return floor(lat / self.cell_deg), floor(lng / self.cell_deg)
+
+    def add(self, point: GeoPoint) -> None:
+        self.remove(point.gis_id)
+        cell = self._cell(point.lat, point.lng)
+        self._cells.setdefault(cell, {})[point.gis_id] = point
+        self._cell_of[point.gis_id] = cell
+
+    def remove(self, gis_id: str) -> None:
+        cell = self._cell_of.pop(gis_id, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        bucket.pop(gis_id, None)
+        if not bucket:
+            del self._cells[cell]
+
+    def query(self, bbox: BBox, category: str | None = None) -> list[GeoPoint]:
+        min_lat, max_lat, min_lng, max_lng = bbox
+        row_lo, col_lo = self._cell(min_lat, min_lng)
+        row_hi, col_hi = self._cell(max_lat, max_lng)
+        found: list[GeoPoint] = []
+        for row in range(row_lo, row_hi + 1):
+            for col in range(col_lo, col_hi + 1):
+                bucket = self._cells.get((row, col))
+                if not bucket:
+                    continue
+                for point in bucket.values():
+                    if category and point.category != category:
+                        continue
+                    if min_lat <= point.lat <= max_lat and min_lng <= point.lng <= max_lng:
+                        found.append(point)
+        return found
+
+
+class GeoIndex:
+    def __init__(self, cell_deg: float, ttl_seconds: int, max_cities: int) -> None:
+        self.cell_deg = cell_deg
+        self.ttl_seconds = ttl_seconds
+        self.max_cities = max_cities
+        self._grids: dict[str, CityGrid] = {}
+        self._loading: dict[str, asyncio.Task] = {}
+
+    def grid(self, city: str) -> CityGrid | None:
+        grid = self._grids.get(city)
+        if grid is None or time.monotonic() - grid.loaded_at >= self.ttl_seconds:
+            self.warm(city)
+        return grid
+
+    def add_point(self, city: str, point: GeoPoint) -> None:
+        grid = self._grids.get(city)
+        if grid is not None:
+            grid.add(point)
+
+    async def add(self, org: Organization) -> None:
+        self.add_point(org.city, point_from_org(org))
+        message = {
+            "city": org.city,
+            "id": str(org.id),
+            "gis_id": org.gis_id,
+            "name": org.name,
+            "category": Category(org.category).value,
+            "lat": org.lat,
+            "lng": org.lng,
+        }
+        await redis_call("publish", ADDED_CHANNEL, json.dumps(message))
+
+    def clear(self) -> None:
+        self._grids.clear()
+
+    def warm(self, city: str) -> None:
+        if city in self._loading:
+            return
+        task = asyncio.create_task(self.load_city(city))
+        self._loading[city] = task
+        task.add_done_callback(lambda _t: self._loading.pop(city, None))
+
+    async def load_city(self, city: str) -> CityGrid:
+        grid = CityGrid(self.cell_deg)
+        async with AsyncReadSessionLocal() as db:
+            result = await db.execute(_point_select().where(Organization.city == city))
+            for row in result.all():
+                grid.add(GeoPoint(*row))
+        self._grids.pop(city, None)
+        if len(grid):
+            self._grids[city] = grid
+            while len(self._grids) > self.max_cities:
+                del self._grids[next(iter(self._grids))]
+        return grid
+
+
+geo_index = GeoIndex(settings.GEO_INDEX_CELL_DEG, settings.GEO_INDEX_TTL_SECONDS, settings.GEO_INDEX_MAX_CITIES)
+
+
+def _on_added(data: str) -> None:
+    message = json.loads(data)
+    point = GeoPoint(
+        id=UUID(message["id"]),
+        gis_id=message["gis_id"],
+        name=message["name"],
+        category=Category(message["category"]),
+        lat=message["lat"],
+        lng=message["lng"],
+    )
+    geo_index.add_point(message["city"], point)
+
+
+def start_geo_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = asyncio.create_task(subscribe_forever(ADDED_CHANNEL, _on_added, geo_index.clear))
+
+
+async def stop_geo_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
+
+
+async def _query_bbox(db: AsyncSession, city: str, bbox: BBox, category: str | None) -> list[GeoPoint]:
+    min_lat, max_lat, min_lng, max_lng = bbox
+    stmt = _point_select().where(
+        Organization.city == city,
+        Organization.lat.between(min_lat, max_lat),
+        Organization.lng.between(min_lng, max_lng),
+    )
+    if category:
+        stmt = stmt.where(Organization.category == category)
+    result = await db.execute(stmt)
+    return [GeoPoint(*row) for row in result.all()]
+
+
+async def find_nearby_orgs(
+    db: AsyncSession, city: str, lat: float, lng: float, radius_km: float, category: str | None
+) -> list[GeoPoint]:
+    bbox = bounding_box(lat, lng, radius_km)
+    grid = geo_index.grid(city)
+    if grid is None:
+        return await _query_bbox(db, city, bbox, category)
+    return grid.query(bbox, category)
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.models import Booking, BookingStatus, Slot, SlotStatus
+from app.db.session import AsyncSessionLocal
+from app.services.redis_client import fallback_redis, redis_call, redis_pipeline
+
+logger = logging.getLogger(__name__)
+
+HOLDS_KEY = "holds:pending"
+CLAIM_KEY_PREFIX = "holds:claim:"
+RELEASE_LOCK_KEY = "holds:release:lock"
+
+ZREM_DUE_LUA = """
+local removed = 0
+for i = 2, #ARGV do
+  local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+  if score and tonumber(score) <= tonumber(ARGV[1]) then
+    removed = removed + redis.call('ZREM', KEYS[1], ARGV[i])
+  end
+end
+return removed
+"""
+
+reserve_admission_total = registry.counter(
+    "reserve_admission_total", "Slot reservation attempts by admission gate outcome.", ("result",)
+)
+
+_poller: asyncio.Task | None = None
+
+
+async def _zrem_due_fallback(store, keys: list[str], args: list) -> int:
+    removed = 0
+    for member in args[1:]:
+        score = await store.zscore(keys[0], member)
+        if score is not None and score <= float(args[0]):
+            removed += await store.zrem(keys[0], member)
+    return removed
+
+
+fallback_redis.register_script(ZREM_DUE_LUA, _zrem_due_fallback)
+
+
+async def register_holds(slot_ids: list[UUID], pending_until: datetime) -> None:
+    await redis_call("zadd", HOLDS_KEY, {str(slot_id): pending_until.timestamp() for slot_id in slot_ids})
+
+
+def _claim_key(slot_id: UUID) -> str:
+    return f"{CLAIM_KEY_PREFIX}{slot_id}"
+
+
+async def claim_slots(slot_ids: list[UUID], client_id: UUID, ttl_seconds: int) -> bool:
+    if not settings.RESERVE_ADMISSION_GATE:
+        return True
+
+    def build(pipe) -> None:
+        for slot_id in slot_ids:
+            pipe.set(_claim_key(slot_id), str(client_id), ex=ttl_seconds, nx=True)
+
+    claimed = await redis_pipeline(build)
+    if all(claimed):
+        reserve_admission_total.inc("admitted")
+        return True
+    await release_claims([slot_id for slot_id, ok in zip(slot_ids, claimed, strict=True) if ok])
+    reserve_admission_total.inc("rejected")
+    return False
+
+
+async def release_claims(slot_ids: list[UUID]) -> None:
+    if settings.RESERVE_ADMISSION_GATE and slot_ids:
+        await redis_call("delete", *[_claim_key(slot_id) for slot_id in slot_ids])
+
+
+async def release_expired_holds(db: AsyncSession, slot_ids: list[UUID] | None = None) -> list[UUID]:
+    conditions = [Slot.status == SlotStatus.pending, Slot.pending_until < datetime.now(timezone.utc)]
+    if slot_ids is not None:
+        conditions.append(Slot.id.in_(slot_ids))
+    released = (
+        update(Slot)
+        .where(*conditions)
+        .values(status=SlotStatus.available, pending_until=None)
+        .returning(Slot.id)
+        .cte("released")
+    )
+    expired = (
+        update(Booking)
+        .where(Booking.slot_id == released.c.id, Booking.status == BookingStatus.pending)
+        .values(status=BookingStatus.expired)
+        .returning(Booking.slot_id)
+        .cte("expired")
+    )
+    result = await db.execute(select(released.c.id).add_cte(expired))
+    return list(result.scalars().all())
+
+
+async def release_due_holds() -> int:
+    cutoff = datetime.now(timezone.utc).timestamp()
+    due = await redis_call("zrangebyscore", HOLDS_KEY, "-inf", cutoff, start=0, num=settings.HOLD_RELEASE_BATCH)
+    if not due:
+        return 0
+
+    async with AsyncSessionLocal() as db:
+        released = await release_expired_holds(db, [UUID(slot_id) for slot_id in due])
+        await db.commit()
+    await redis_call("eval", ZREM_DUE_LUA, 1, HOLDS_KEY, repr(cutoff), *due)
+    await release_claims(released)
+    return len(released)
+
+
+async def _acquire_release_lock() -> bool:
+    ttl_ms = max(int(settings.HOLD_RELEASE_POLL_SECONDS * 1000), 1)
+    return bool(await redis_call("set", RELEASE_LOCK_KEY, "1", nx=True, px=ttl_ms))
+
+
+async def _poll_forever() -> None:
+    while True:
+        try:
+            if await _acquire_release_lock():
+                while await release_due_holds() >= settings.HOLD_RELEASE_BATCH:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Releasing expired holds failed")
+        await asyncio.sleep(settings.HOLD_RELEASE_POLL_SECONDS)
+
+
+def start_hold_poller() -> None:
+    global _poller
+    if _poller is None and settings.HOLD_RELEASE_POLL_SECONDS > 0:
+        _poller = asyncio.create_task(_poll_forever())
+
+
+async def stop_hold_poller() -> None:
+    global _poller
+    if _poller is not None:
+        _poller.cancel()
+        try:
+            await _poller
+        except asyncio.CancelledError:
+            pass
+        _poller = None
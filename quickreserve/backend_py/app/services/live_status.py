@@ -1,28 +1,120 @@
+import asyncio
 import json
 from datetime import datetime, timezone
 
-from app.services.redis_client import redis_call
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.redis_client import get_redis, redis_call, redis_pipeline, subscribe_forever
+
+CITIES_KEY = "live:cities"
+LEGACY_STATUS_PATTERN = "live:status:*"
+INVALIDATION_CHANNEL = "live:invalidate"
+_MISSING = ""
+
+status_cache = TTLCache(settings.LIVE_STATUS_CACHE_SIZE, settings.LIVE_STATUS_CACHE_TTL_SECONDS, "live_status")
+_listener: asyncio.Task | None = None
+
+
+def _status_key(city: str) -> str:
+    return f"live:city:{city}:status"
+
+
+def _updated_key(city: str) -> str:
+    return f"live:city:{city}:updated"
+
+
+def _invalidate(city: str, gis_ids: list[str]) -> None:
+    for gis_id in gis_ids:
+        status_cache.pop((city, gis_id))
+
+
+def _on_invalidation(data: str) -> None:
+    message = json.loads(data)
+    _invalidate(message["city"], message["gis_ids"])
+
+
+def start_invalidation_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = asyncio.create_task(subscribe_forever(INVALIDATION_CHANNEL, _on_invalidation, status_cache.clear))
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
 
 
 async def set_live_status(gis_id: str, status: str, city: str) -> None:
-    key = f"live:status:{gis_id}"
-    value = {
-        "status": status,
-        "city": city,
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-    }
-    await redis_call("set", key, json.dumps(value))
+    now = datetime.now(timezone.utc).timestamp()
+    _invalidate(city, [gis_id])
+    await redis_pipeline(
+        lambda pipe: pipe.hset(_status_key(city), gis_id, status)
+        .zadd(_updated_key(city), {gis_id: now})
+        .sadd(CITIES_KEY, city)
+        .publish(INVALIDATION_CHANNEL, json.dumps({"city": city, "gis_ids": [gis_id]}))
+    )
 
 
-async def get_live_statuses(gis_ids: list[str]) -> dict[str, str]:
+async def get_live_statuses(city: str, gis_ids: list[str]) -> dict[str, str]:
     if not gis_ids:
         return {}
 
-    keys = [f"live:status:{gis_id}" for gis_id in gis_ids]
-    raw = await redis_call("mget", keys)
     result: dict[str, str] = {}
-    for gis_id, payload in zip(gis_ids, raw, strict=True):
-        if not payload:
-            continue
-        result[gis_id] = json.loads(payload).get("status", "unknown")
+    missing: list[str] = []
+    for gis_id in gis_ids:
+        status = status_cache.get((city, gis_id))
+        if status is None:
+            missing.append(gis_id)
+        elif status:
+            result[gis_id] = status
+
+    if missing:
+        raw = await redis_call("hmget", _status_key(city), missing)
+        for gis_id, status in zip(missing, raw, strict=True):
+            status_cache.set((city, gis_id), status or _MISSING)
+            if status:
+                result[gis_id] = status
     return result
+
+
+async def reset_stale_statuses(older_than: datetime, from_status: str = "free", to_status: str = "unknown") -> int:
+    changed = 0
+    now = datetime.now(timezone.utc).timestamp()
+    for city in await redis_call("smembers", CITIES_KEY):
+        stale = await redis_call("zrangebyscore", _updated_key(city), "-inf", older_than.timestamp())
+        if not stale:
+            continue
+        current = await redis_call("hmget", _status_key(city), stale)
+        to_reset = [gis_id for gis_id, status in zip(stale, current, strict=True) if status == from_status]
+        untouched = [gis_id for gis_id, status in zip(stale, current, strict=True) if status != from_status]
+        if untouched:
+            await redis_call("zrem", _updated_key(city), *untouched)
+        if not to_reset:
+            continue
+        _invalidate(city, to_reset)
+        await redis_pipeline(
+            lambda pipe: pipe.hset(_status_key(city), mapping={gis_id: to_status for gis_id in to_reset})
+            .zadd(_updated_key(city), {gis_id: now for gis_id in to_reset})
+            .publish(INVALIDATION_CHANNEL, json.dumps({"city": city, "gis_ids": to_reset}))
+        )
+        changed += len(to_reset)
+    return changed
+
+
+async def drop_legacy_status_keys(batch: int = 1000) -> int:
+    dropped = 0
+    keys: list[str] = []
+    async for key in get_redis().scan_iter(match=LEGACY_STATUS_PATTERN, count=batch):
+        keys.append(key)
+        if len(keys) >= batch:
+            dropped += await redis_call("delete", *keys)
+            keys = []
+    if keys:
+        dropped += await redis_call("delete", *keys)
+    return dropped
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+from app.core.config import settings
+from app.core.metrics import Sample, merge_snapshots, registry
+from app.services.redis_client import redis_call, redis_pipeline
+
+logger = logging.getLogger(__name__)
+
+WORKERS_KEY = "metrics:api:workers"
+SNAPSHOT_KEY_PREFIX = "metrics:api:snapshot:"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_publisher: asyncio.Task | None = None
+
+
+def _ttl_seconds() -> int:
+    return max(int(settings.METRICS_SHARE_SECONDS * 3), 1)
+
+
+async def publish_snapshot(snapshot: dict[str, list[Sample]]) -> None:
+    await redis_pipeline(
+        lambda pipe: pipe.set(f"{SNAPSHOT_KEY_PREFIX}{WORKER_ID}", json.dumps(snapshot), ex=_ttl_seconds())
+        .zadd(WORKERS_KEY, {WORKER_ID: time.time()})
+    )
+
+
+async def render_all_workers() -> str:
+    if settings.METRICS_SHARE_SECONDS <= 0:
+        return registry.render()
+    local = registry.snapshot()
+    await publish_snapshot(local)
+    cutoff = time.time() - _ttl_seconds()
+    gone = await redis_call("zrangebyscore", WORKERS_KEY, "-inf", cutoff)
+    if gone:
+        await redis_call("zrem", WORKERS_KEY, *gone)
+    others = [worker for worker in await redis_call("zrangebyscore", WORKERS_KEY, cutoff, "+inf") if worker != WORKER_ID]
+    snapshots = [local]
+    if others:
+        raw = await redis_call("mget", [f"{SNAPSHOT_KEY_PREFIX}{worker}" for worker in others])
+        snapshots.extend(json.loads(value) for value in raw if value)
+    return registry.render(merge_snapshots(snapshots))
+
+
+async def _publish_forever() -> None:
+    while True:
+        try:
+            await publish_snapshot(registry.snapshot())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Publishing API metrics failed")
+        await asyncio.sleep(settings.METRICS_SHARE_SECONDS)
+
+
+def start_metrics_publisher() -> None:
+    global _publisher
+    if _publisher is None and settings.METRICS_ENABLED and settings.METRICS_SHARE_SECONDS > 0:
+        _publisher = asyncio.create_task(_publish_forever())
+
+
+async def stop_metrics_publisher() -> None:
+    global _publisher
+    if _publisher is not None:
+        _publisher.cancel()
+        try:
+            await _publisher
+        except asyncio.CancelledError:
+            pass
+        _publisher = None
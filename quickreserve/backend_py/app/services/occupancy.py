@@ -0,0 +1,129 @@
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import CompanyOccupancy, CompanyProfile
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class SlotGrid:
+    def __init__(self, work_start: str, work_end: str, slot_minutes: int) -> None:
+        self.opens = _minutes(work_start)
+        self.slot_minutes = slot_minutes
+        self.work_minutes = (_minutes(work_end) - self.opens) % (24 * 60) or 24 * 60
+        self.size = -(-self.work_minutes // slot_minutes)
+
+    @classmethod
+    def for_profile(cls, profile: CompanyProfile) -> "SlotGrid":
+        return cls(profile.work_start, profile.work_end, profile.slot_duration_minutes)
+
+    def index(self, slot: str) -> int:
+        offset = (_minutes(slot) - self.opens) % (24 * 60)
+        if offset % self.slot_minutes or not 0 <= offset // self.slot_minutes < self.size:
+            raise ValueError(f"{slot} is not on the slot grid")
+        return offset // self.slot_minutes
+
+    def label(self, index: int) -> str:
+        minutes = (self.opens + index * self.slot_minutes) % (24 * 60)
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def current_index(self, now: datetime) -> int | None:
+        offset = (now.hour * 60 + now.minute - self.opens) % (24 * 60)
+        return offset // self.slot_minutes if offset < self.work_minutes else None
+
+    def upcoming_index(self, now: datetime) -> int:
+        current = self.current_index(now)
+        if current is not None:
+            return current
+        return 0 if now.hour * 60 + now.minute < self.opens else self.size
+
+    def empty(self) -> bytes:
+        return bytes((self.size + 7) // 8)
+
+
+def set_bits(bits: bytes, occupy: list[int], release: list[int]) -> bytes:
+    value = int.from_bytes(bits, "little")
+    for index in occupy:
+        value |= 1 << index
+    for index in release:
+        value &= ~(1 << index)
+    return value.to_bytes(len(bits), "little")
+
+
+def from_indexes(grid: SlotGrid, indexes: list[int]) -> bytes:
+    return set_bits(grid.empty(), indexes, [])
+
+
+def occupied_indexes(bits: bytes) -> list[int]:
+    value = int.from_bytes(bits, "little")
+    indexes = []
+    while value:
+        low = value & -value
+        indexes.append(low.bit_length() - 1)
+        value ^= low
+    return indexes
+
+
+def is_free(bits: bytes, index: int) -> bool:
+    return not bits[index // 8] >> (index % 8) & 1
+
+
+def next_free_index(bits: bytes, grid: SlotGrid, start: int) -> int | None:
+    free = ~int.from_bytes(bits, "little") & ((1 << grid.size) - 1)
+    free >>= start
+    if not free:
+        return None
+    return start + (free & -free).bit_length() - 1
+
+
+def live_status_for(bits: bytes, grid: SlotGrid, now: datetime) -> str:
+    index = grid.current_index(now)
+    if index is None or not is_free(bits, index):
+        return "busy"
+    return "free"
+
+
+async def get_occupancy(db: AsyncSession, company_id: UUID, day: date, grid: SlotGrid) -> bytes:
+    result = await db.execute(
+        select(CompanyOccupancy.bits).where(CompanyOccupancy.company_id == company_id, CompanyOccupancy.day == day)
+    )
+    empty = grid.empty()
+    bits = result.scalar_one_or_none() or empty
+    return bits.ljust(len(empty), b"\0")[: len(empty)]
+
+
+async def replace_occupancy(db: AsyncSession, company_id: UUID, day: date, bits: bytes) -> bytes:
+    stmt = pg_insert(CompanyOccupancy).values(company_id=company_id, day=day, bits=bits)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CompanyOccupancy.company_id, CompanyOccupancy.day],
+        set_={"bits": stmt.excluded.bits},
+    )
+    await db.execute(stmt)
+    return bits
+
+
+async def update_occupancy(
+    db: AsyncSession, company_id: UUID, day: date, grid: SlotGrid, occupy: list[int], release: list[int]
+) -> bytes:
+    empty = grid.empty()
+    merged = func.substring(CompanyOccupancy.bits.concat(empty), 1, len(empty))
+    for index in occupy:
+        merged = func.set_bit(merged, index, 1)
+    for index in release:
+        merged = func.set_bit(merged, index, 0)
+
+    stmt = (
+        pg_insert(CompanyOccupancy)
+        .values(company_id=company_id, day=day, bits=set_bits(empty, occupy, release))
+        .on_conflict_do_update(index_elements=[CompanyOccupancy.company_id, CompanyOccupancy.day], set_={"bits": merged})
+        .returning(CompanyOccupancy.bits)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one()
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from types import FrameType
+
+from app.core.config import settings
+from app.services.redis_client import redis_call, redis_pipeline, subscribe_forever
+
+logger = logging.getLogger(__name__)
+
+PROFILER_CONFIG_KEY = "profiler:config"
+PROFILER_CHANNEL = "profiler:control"
+PROFILER_STACKS_KEY = "profiler:stacks"
+PROFILER_SLOW_KEY = "profiler:slow"
+PROFILER_DATA_TTL_SECONDS = 24 * 3600
+SLOW_TOP_FRAMES = 10
+HANDLER_MODULE = "fastapi.routing"
+
+_listener: asyncio.Task | None = None
+
+
+@dataclass(slots=True)
+class ProfilerConfig:
+    until: float
+    sample_rate: float = 1.0
+    interval_ms: float = 5.0
+    slow_ms: float = 500.0
+
+
+@dataclass(slots=True)
+class TrackedRequest:
+    scope: dict
+    started: float
+    samples: Counter = field(default_factory=Counter)
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get("route"), "path", self.scope.get("path", "unmatched"))
+
+
+def _label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_qualname}"
+
+
+def _await_chain(task: asyncio.Task) -> tuple[list[FrameType], object]:
+    frames: list[FrameType] = []
+    awaited: object = task.get_coro()
+    while awaited is not None:
+        frame = getattr(awaited, "cr_frame", None) or getattr(awaited, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        awaited = getattr(awaited, "cr_await", None) or getattr(awaited, "gi_yieldfrom", None)
+    return frames, awaited
+
+
+class SamplingProfiler:
+    def __init__(self) -> None:
+        self.config: ProfilerConfig | None = None
+        self.samples = 0
+        self._loop_thread_id: int | None = None
+        self._tracked: dict[asyncio.Task, TrackedRequest] = {}
+        self._stacks: Counter = Counter()
+        self._slow: list[dict] = []
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._flusher: asyncio.Task | None = None
+
+    @property
+    def active(self) -> bool:
+        config = self.config
+        return config is not None and time.time() < config.until
+
+    def apply(self, config: ProfilerConfig | None) -> None:
+        if config is None or config.until <= time.time():
+            self.config = None
+            self._stop.set()
+            return
+        self.config = config
+        self._loop_thread_id = threading.get_ident()
+        self._stop.set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="profiler-sampler", daemon=True)
+        self._thread.start()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+    def should_track(self) -> bool:
+        config = self.config
+        return config is not None and time.time() < config.until and random.random() < config.sample_rate
+
+    def track(self, task: asyncio.Task, scope: dict) -> TrackedRequest:
+        request = self._tracked[task] = TrackedRequest(scope, time.perf_counter())
+        return request
+
+    def untrack(self, task: asyncio.Task) -> None:
+        request = self._tracked.pop(task, None)
+        config = self.config
+        if request is None or config is None:
+            return
+        duration_ms = (time.perf_counter() - request.started) * 1000
+        if duration_ms < config.slow_ms:
+            return
+        with self._lock:
+            samples = request.samples.copy()
+        leaves: Counter = Counter()
+        for stack, count in samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        self._slow.append(
+            {
+                "at": time.time(),
+                "method": request.scope.get("method"),
+                "route": request.route,
+                "path": request.scope.get("path"),
+                "duration_ms": round(duration_ms, 2),
+                "samples": sum(samples.values()),
+                "top_frames": leaves.most_common(SLOW_TOP_FRAMES),
+            }
+        )
+
+    def _run(self, stop: threading.Event) -> None:
+        while self.active and not stop.wait((self.config or ProfilerConfig(0)).interval_ms / 1000):
+            try:
+                self._sample()
+            except Exception:
+                logger.exception("Profiler sample failed")
+
+    def _sample(self) -> None:
+        thread_frame = sys._current_frames().get(self._loop_thread_id)
+        for task, request in list(self._tracked.items()):
+            chain, awaited = _await_chain(task)
+            if not chain:
+                continue
+            innermost = chain[-1]
+            below: list[FrameType] = []
+            frame = thread_frame
+            while frame is not None and frame is not innermost:
+                below.append(frame)
+                frame = frame.f_back
+            running = frame is innermost
+            if running:
+                chain.extend(reversed(below))
+            start = next((i for i, frame in enumerate(chain) if frame.f_globals.get("__name__") == HANDLER_MODULE), 0)
+            stack = [_label(frame) for frame in chain[start:]]
+            if not running:
+                stack.append(f"[await:{type(awaited).__name__}]")
+            key = ";".join(stack)
+            with self._lock:
+                request.samples[key] += 1
+                self._stacks[f"{request.route};{key}"] += 1
+        self.samples += 1
+
+    async def _flush_forever(self) -> None:
+        while self.active:
+            await asyncio.sleep(settings.PROFILER_FLUSH_SECONDS)
+            await self.flush()
+        await self.flush()
+
+    async def flush(self) -> None:
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+        slow, self._slow = self._slow, []
+        if not stacks and not slow:
+            return
+
+        def build(pipe) -> None:
+            for stack, count in stacks.items():
+                pipe.hincrby(PROFILER_STACKS_KEY, stack, count)
+            if slow:
+                pipe.zadd(PROFILER_SLOW_KEY, {json.dumps(entry): entry["at"] for entry in slow})
+            pipe.expire(PROFILER_STACKS_KEY, PROFILER_DATA_TTL_SECONDS)
+            pipe.expire(PROFILER_SLOW_KEY, PROFILER_DATA_TTL_SECONDS)
+
+        await redis_pipeline(build)
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "config": asdict(self.config) if self.active else None,
+            "in_flight": len(self._tracked),
+            "samples": self.samples,
+        }
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilerMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not profiler.should_track():
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        profiler.track(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.untrack(task)
+
+
+def _decode(data: str | None) -> ProfilerConfig | None:
+    if not data:
+        return None
+    return ProfilerConfig(**json.loads(data))
+
+
+def _on_control(data: str) -> None:
+    profiler.apply(_decode(data))
+
+
+async def start_profiling(config: ProfilerConfig, reset: bool) -> None:
+    data = json.dumps(asdict(config))
+    ttl = max(int(config.until - time.time()), 1)
+    if reset:
+        await redis_call("delete", PROFILER_STACKS_KEY, PROFILER_SLOW_KEY)
+    await redis_pipeline(lambda pipe: pipe.set(PROFILER_CONFIG_KEY, data, ex=ttl).publish(PROFILER_CHANNEL, data))
+    profiler.apply(config)
+
+
+async def stop_profiling() -> None:
+    await redis_pipeline(lambda pipe: pipe.delete(PROFILER_CONFIG_KEY).publish(PROFILER_CHANNEL, ""))
+    profiler.apply(None)
+    await profiler.flush()
+
+
+async def collapsed_stacks(route: str | None = None) -> str:
+    await profiler.flush()
+    stacks = await redis_call("hgetall", PROFILER_STACKS_KEY)
+    prefix = f"{route};" if route else ""
+    lines = [f"{stack} {count}" for stack, count in stacks.items() if stack.startswith(prefix)]
+    return "\n".join(sorted(lines)) + "\n" if lines else ""
+
+
+async def slow_requests(limit: int) -> list[dict]:
+    await profiler.flush()
+    entries = await redis_call("zrangebyscore", PROFILER_SLOW_KEY, "-inf", "+inf")
+    return [json.loads(entry) for entry in entries[-limit:]][::-1]
+
+
+async def _load_config() -> None:
+    profiler.apply(_decode(await redis_call("get", PROFILER_CONFIG_KEY)))
+
+
+def start_profiler_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = asyncio.create_task(subscribe_forever(PROFILER_CHANNEL, _on_control))
+        asyncio.create_task(_load_config())
+
+
+async def stop_profiler_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
+    profiler.apply(None)
+    await profiler.flush()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from math import ceil
+
+from app.services.redis_client import fallback_redis, redis_call
+
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  wait = math.ceil((cost - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+if wait == 0 then
+  return {1, 0}
+end
+return {0, wait}
+"""
+
+
+async def _token_bucket_fallback(store, keys: list[str], args: list) -> list[int]:
+    capacity, rate, cost = float(args[0]), float(args[1]), float(args[2])
+    now = time.time() * 1000
+    raw = await store.get(keys[0])
+    tokens, ts = (float(x) for x in raw.split(":")) if raw else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+    wait = 0
+    if tokens >= cost:
+        tokens -= cost
+    else:
+        wait = ceil((cost - tokens) / rate)
+    await store.setex(keys[0], ceil(capacity / rate / 1000) + 1, f"{tokens}:{now}")
+    return [0, wait] if wait else [1, 0]
+
+
+fallback_redis.register_script(TOKEN_BUCKET_LUA, _token_bucket_fallback)
+
+
+class RateLimiter:
+    def __init__(self, name: str, limit: int, period_seconds: float, burst: int | None = None) -> None:
+        self.name = name
+        self.capacity = max(burst or limit, 1)
+        self.rate_per_ms = limit / (period_seconds * 1000)
+
+    async def check(self, key: str = "global", cost: int = 1) -> tuple[bool, int]:
+        allowed, wait_ms = await redis_call(
+            "eval",
+            TOKEN_BUCKET_LUA,
+            1,
+            f"ratelimit:{self.name}:{key}",
+            self.capacity,
+            repr(self.rate_per_ms),
+            cost,
+        )
+        return bool(int(allowed)), int(wait_ms)
+
+    async def acquire(self, key: str = "global", cost: int = 1, wait_ms: int = 0) -> bool:
+        deadline = time.monotonic() + wait_ms / 1000
+        while True:
+            allowed, retry_ms = await self.check(key, cost)
+            if allowed:
+                return True
+            remaining = deadline - time.monotonic()
+            if retry_ms / 1000 > remaining:
+                return False
+            await asyncio.sleep(retry_ms / 1000)
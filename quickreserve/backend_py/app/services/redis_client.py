@@ -1,74 +1,481 @@
 from __future__ import annotations
 
+import asyncio
 import fnmatch
-import inspect
-from datetime import datetime, timedelta, timezone
+import heapq
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
 
 import redis.asyncio as redis
 
 from app.core.config import settings
+from app.core.metrics import registry
+
+
+_ABSENT = object()
+
+KEY_OVERHEAD_BYTES = 64
+SCORE_BYTES = 8
+SWEEP_BUDGET = 32
+
+
+class InMemoryPipeline:
+    def __init__(self, store: InMemoryRedis) -> None:
+        self._store = store
+        self._commands: list[tuple[Callable[..., Awaitable], tuple, dict]] = []
+
+    def __getattr__(self, method: str):
+        fn = getattr(self._store, method)
+
+        def queue(*args, **kwargs):
+            self._commands.append((fn, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [await fn(*args, **kwargs) for fn, args, kwargs in commands]
 
 
 class InMemoryRedis:
-    def __init__(self) -> None:
-        self._data: dict[str, str] = {}
-        self._ttl: dict[str, datetime] = {}
+    def __init__(self, max_keys: int = 0, max_bytes: int = 0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.expired_keys = 0
+        self.evicted_keys = 0
+        self._clock = clock
+        self._data: OrderedDict[str, Any] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._expires: dict[str, float] = {}
+        self._deadlines: list[tuple[float, str]] = []
+        self._patterns: dict[str, re.Pattern] = {}
+        self._scripts: dict[str, Callable[..., Awaitable]] = {}
 
-    def _purge_expired(self, key: str) -> None:
-        exp = self._ttl.get(key)
-        if exp and datetime.now(timezone.utc) >= exp:
-            self._ttl.pop(key, None)
-            self._data.pop(key, None)
+    def _delete(self, key: str) -> bool:
+        if self._data.pop(key, _ABSENT) is _ABSENT:
+            return False
+        self._expires.pop(key, None)
+        self.used_bytes -= self._sizes.pop(key, 0)
+        return True
 
-    async def get(self, key: str):
-        self._purge_expired(key)
-        return self._data.get(key)
+    def _lookup(self, key: str) -> Any | None:
+        deadline = self._expires.get(key)
+        if deadline is not None and self._clock() >= deadline:
+            self._delete(key)
+            self.expired_keys += 1
+            return None
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def _container(self, key: str, factory: Callable[[], Any]) -> Any:
+        value = self._lookup(key)
+        if value is None:
+            value = self._data[key] = factory()
+            self._resize(key, KEY_OVERHEAD_BYTES + len(key))
+        return value
+
+    def _resize(self, key: str, delta: int) -> None:
+        self._sizes[key] = self._sizes.get(key, 0) + delta
+        self.used_bytes += delta
+
+    def _set_deadline(self, key: str, seconds: float) -> None:
+        deadline = self._clock() + seconds
+        self._expires[key] = deadline
+        heapq.heappush(self._deadlines, (deadline, key))
+
+    def _sweep(self) -> None:
+        now = self._clock()
+        budget = SWEEP_BUDGET
+        while self._deadlines and budget and self._deadlines[0][0] <= now:
+            deadline, key = heapq.heappop(self._deadlines)
+            budget -= 1
+            if self._expires.get(key) == deadline and self._delete(key):
+                self.expired_keys += 1
 
-    async def set(self, key: str, value: str):
+    def _evict(self) -> None:
+        self._sweep()
+        while len(self._data) > 1 and (
+            (self.max_keys and len(self._data) > self.max_keys) or (self.max_bytes and self.used_bytes > self.max_bytes)
+        ):
+            key = next(iter(self._data))
+            self._delete(key)
+            self.evicted_keys += 1
+
+    def _store_string(self, key: str, value: str) -> None:
+        self._delete(key)
         self._data[key] = value
-        self._ttl.pop(key, None)
+        self._resize(key, KEY_OVERHEAD_BYTES + len(key) + len(value))
+
+    async def get(self, key: str):
+        return self._lookup(key)
+
+    async def set(self, key: str, value: str, ex: float | None = None, px: int | None = None, nx: bool = False):
+        if nx and self._lookup(key) is not None:
+            return None
+        self._store_string(key, str(value))
+        if ex is not None:
+            self._set_deadline(key, ex)
+        elif px is not None:
+            self._set_deadline(key, px / 1000)
+        self._evict()
         return True
 
     async def setex(self, key: str, seconds: int, value: str):
-        self._data[key] = value
-        self._ttl[key] = datetime.now(timezone.utc) + timedelta(seconds=seconds)
-        return True
+        return await self.set(key, value, ex=seconds)
+
+    async def mget(self, keys: list[str], *args):
+        return [self._lookup(key) for key in [*keys, *args]]
 
-    async def mget(self, keys: list[str]):
-        return [await self.get(key) for key in keys]
+    async def delete(self, *keys: str):
+        return sum(1 for key in keys if self._delete(key))
 
     async def incr(self, key: str):
-        current = await self.get(key)
-        value = int(current or "0") + 1
-        await self.set(key, str(value))
+        value = int(self._lookup(key) or "0") + 1
+        deadline = self._expires.get(key)
+        self._store_string(key, str(value))
+        if deadline is not None:
+            self._expires[key] = deadline
+        self._evict()
         return value
 
     async def expire(self, key: str, seconds: int):
-        if key in self._data:
-            self._ttl[key] = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+        if self._lookup(key) is None:
+            return False
+        self._set_deadline(key, seconds)
         return True
 
-    async def scan_iter(self, match: str = "*"):
-        for key in list(self._data.keys()):
-            self._purge_expired(key)
-            if key in self._data and fnmatch.fnmatch(key, match):
+    async def hset(self, name: str, key: str | None = None, value: str | None = None, mapping: dict | None = None):
+        items = dict(mapping or {})
+        if key is not None:
+            items[key] = value
+        bucket = self._container(name, dict)
+        added = 0
+        delta = 0
+        for field, v in items.items():
+            v = str(v)
+            old = bucket.get(field)
+            if old is None:
+                added += 1
+                delta += len(field) + len(v)
+            else:
+                delta += len(v) - len(old)
+            bucket[field] = v
+        self._resize(name, delta)
+        self._evict()
+        return added
+
+    async def hget(self, name: str, key: str):
+        return (self._lookup(name) or {}).get(key)
+
+    async def hmget(self, name: str, keys: list[str], *args):
+        bucket = self._lookup(name) or {}
+        return [bucket.get(key) for key in [*keys, *args]]
+
+    async def hgetall(self, name: str):
+        return dict(self._lookup(name) or {})
+
+    async def _hincr(self, name: str, key: str, amount, cast: Callable[[str], Any]):
+        bucket = self._container(name, dict)
+        old = bucket.get(key)
+        value = cast(old or "0") + amount
+        bucket[key] = str(value)
+        self._resize(name, len(bucket[key]) - len(old) if old is not None else len(key) + len(bucket[key]))
+        self._evict()
+        return value
+
+    async def hincrby(self, name: str, key: str, amount: int = 1):
+        return await self._hincr(name, key, amount, int)
+
+    async def hincrbyfloat(self, name: str, key: str, amount: float = 1.0):
+        return await self._hincr(name, key, amount, float)
+
+    async def hdel(self, name: str, *keys: str):
+        bucket = self._lookup(name) or {}
+        removed = 0
+        for key in keys:
+            old = bucket.pop(key, None)
+            if old is not None:
+                removed += 1
+                self._resize(name, -(len(key) + len(old)))
+        return removed
+
+    async def zadd(self, name: str, mapping: dict[str, float]):
+        zset = self._container(name, dict)
+        added = sum(1 for member in mapping if member not in zset)
+        self._resize(name, sum(len(member) + SCORE_BYTES for member in mapping if member not in zset))
+        zset.update({member: float(score) for member, score in mapping.items()})
+        self._evict()
+        return added
+
+    async def zrem(self, name: str, *members: str):
+        zset = self._lookup(name) or {}
+        removed = [member for member in members if zset.pop(member, None) is not None]
+        self._resize(name, -sum(len(member) + SCORE_BYTES for member in removed))
+        return len(removed)
+
+    async def zscore(self, name: str, member: str):
+        return (self._lookup(name) or {}).get(member)
+
+    async def zrangebyscore(self, name: str, min, max, start: int | None = None, num: int | None = None):
+        low, high = float(min), float(max)
+        zset = self._lookup(name) or {}
+        members = [m for m, score in sorted(zset.items(), key=lambda x: (x[1], x[0])) if low <= score <= high]
+        if start is not None and num is not None:
+            members = members[start : start + num]
+        return members
+
+    async def sadd(self, name: str, *values: str):
+        members = self._container(name, set)
+        new = set(values) - members
+        members.update(new)
+        self._resize(name, sum(len(v) for v in new))
+        self._evict()
+        return len(new)
+
+    async def smembers(self, name: str):
+        return set(self._lookup(name) or ())
+
+    async def publish(self, channel: str, message: str):
+        return 0
+
+    def pipeline(self, transaction: bool = True) -> InMemoryPipeline:
+        return InMemoryPipeline(self)
+
+    def register_script(self, script: str, fn: Callable[..., Awaitable]) -> None:
+        self._scripts[script] = fn
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        fn = self._scripts[script]
+        return await fn(self, list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:]))
+
+    async def scan_iter(self, match: str = "*", count: int | None = None):
+        pattern = self._patterns.get(match)
+        if pattern is None:
+            pattern = self._patterns[match] = re.compile(fnmatch.translate(match))
+        for key in [key for key in self._data if pattern.match(key)]:
+            if self._lookup(key) is not None:
                 yield key
 
+    def info(self) -> dict[str, int]:
+        return {
+            "keys": len(self._data),
+            "used_bytes": self.used_bytes,
+            "expired_keys": self.expired_keys,
+            "evicted_keys": self.evicted_keys,
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.fallback_calls = 0
+        self.transitions = {self.OPEN: 0, self.HALF_OPEN: 0, self.CLOSED: 0}
+
+    def _move(self, state: str) -> None:
+        self.state = state
+        self.transitions[state] += 1
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.opened_at = time.monotonic()
+            if self.state == self.OPEN:
+                self._move(self.HALF_OPEN)
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self._move(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self._move(self.OPEN)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "fallback_calls": self.fallback_calls,
+            "transitions": dict(self.transitions),
+        }
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-fallback_redis = InMemoryRedis()
+
+BREAKER_ERRORS = (redis.ConnectionError, redis.TimeoutError, OSError)
+
+_redis_client: redis.Redis | None = None
+fallback_redis = InMemoryRedis(max_keys=settings.REDIS_FALLBACK_MAX_KEYS, max_bytes=settings.REDIS_FALLBACK_MAX_BYTES)
+redis_breaker = CircuitBreaker(settings.REDIS_BREAKER_FAILURES, settings.REDIS_BREAKER_RESET_SECONDS)
+
+redis_command_seconds = registry.histogram(
+    "redis_command_duration_seconds", "Redis command latency by backend.", ("command", "backend")
+)
+redis_fallback_total = registry.counter(
+    "redis_fallback_calls_total", "Commands served by the in-memory fallback.", ("command",)
+)
+registry.callback(
+    "redis_breaker_open",
+    "1 while the Redis circuit breaker is open or half-open.",
+    "gauge",
+    (),
+    lambda: [((), float(redis_breaker.state != redis_breaker.CLOSED))],
+)
+registry.callback(
+    "redis_breaker_state",
+    "1 for the Redis circuit breaker's current state, 0 for the others.",
+    "gauge",
+    ("state",),
+    lambda: [((state,), float(redis_breaker.state == state)) for state in redis_breaker.transitions],
+)
+registry.callback(
+    "redis_breaker_transitions_total",
+    "Redis circuit breaker transitions by the state entered.",
+    "counter",
+    ("state",),
+    lambda: [((state,), count) for state, count in redis_breaker.transitions.items()],
+)
+registry.callback(
+    "redis_breaker_failures",
+    "Consecutive Redis failures counted by the circuit breaker.",
+    "gauge",
+    (),
+    lambda: [((), redis_breaker.failures)],
+)
+registry.callback(
+    "redis_fallback_keys",
+    "Keys held by the in-memory fallback.",
+    "gauge",
+    (),
+    lambda: [((), fallback_redis.info()["keys"])],
+)
+registry.callback(
+    "redis_fallback_bytes",
+    "Approximate bytes held by the in-memory fallback.",
+    "gauge",
+    (),
+    lambda: [((), fallback_redis.info()["used_bytes"])],
+)
+
+_primary_methods: dict[str, Callable[..., Awaitable]] = {}
+_fallback_methods: dict[str, Callable[..., Awaitable]] = {}
+
+
+def get_redis() -> redis.Redis:
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return _redis_client
+
+
+async def close_redis() -> None:
+    global _redis_client
+    if _redis_client is not None:
+        client, _redis_client = _redis_client, None
+        _primary_methods.clear()
+        await client.aclose()
+
+
+def _method(cache: dict[str, Callable[..., Awaitable]], client: Any, name: str) -> Callable[..., Awaitable]:
+    fn = cache.get(name)
+    if fn is None:
+        fn = cache[name] = getattr(client, name)
+    return fn
+
+
+async def subscribe_forever(
+    channel: str,
+    on_message: Callable[[str], None],
+    on_disconnect: Callable[[], None] | None = None,
+    retry_seconds: float = 5.0,
+) -> None:
+    while True:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                on_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if on_disconnect:
+                on_disconnect()
+            await asyncio.sleep(retry_seconds)
+        finally:
+            await pubsub.aclose()
+
+
+async def redis_pipeline(build: Callable[[Any], Any]) -> list:
+    if redis_breaker.allow():
+        started = time.perf_counter()
+        pipe = get_redis().pipeline(transaction=False)
+        build(pipe)
+        try:
+            result = await pipe.execute()
+        except BREAKER_ERRORS:
+            redis_breaker.record_failure()
+        except Exception:
+            redis_breaker.record_success()
+            raise
+        else:
+            redis_breaker.record_success()
+            redis_command_seconds.observe(time.perf_counter() - started, "pipeline", "redis")
+            return result
+
+    redis_breaker.fallback_calls += 1
+    redis_fallback_total.inc("pipeline")
+    started = time.perf_counter()
+    pipe = fallback_redis.pipeline(transaction=False)
+    build(pipe)
+    try:
+        return await pipe.execute()
+    finally:
+        redis_command_seconds.observe(time.perf_counter() - started, "pipeline", "fallback")
 
 
 async def redis_call(method: str, *args, **kwargs):
+    if redis_breaker.allow():
+        started = time.perf_counter()
+        try:
+            result = await _method(_primary_methods, get_redis(), method)(*args, **kwargs)
+        except BREAKER_ERRORS:
+            redis_breaker.record_failure()
+        except Exception:
+            redis_breaker.record_success()
+            raise
+        else:
+            redis_breaker.record_success()
+            redis_command_seconds.observe(time.perf_counter() - started, method, "redis")
+            return result
+
+    redis_breaker.fallback_calls += 1
+    redis_fallback_total.inc(method)
+    started = time.perf_counter()
     try:
-        fn = getattr(redis_client, method)
-        result = fn(*args, **kwargs)
-        if inspect.isawaitable(result):
-            return await result
-        return result
-    except Exception:
-        fn = getattr(fallback_redis, method)
-        result = fn(*args, **kwargs)
-        if inspect.isawaitable(result):
-            return await result
-        return result
+        return await _method(_fallback_methods, fallback_redis, method)(*args, **kwargs)
+    finally:
+        redis_command_seconds.observe(time.perf_counter() - started, method, "fallback")
@@ -0,0 +1,112 @@
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Booking, Slot, SlotStatus
+
+SLOT_INSERT_CHUNK = 1000
+
+Schedule = tuple[UUID, str, str, int]
+
+
+def _parse_hhmm(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours) % 24, int(minutes))
+
+
+def expand_schedule(
+    place_id: UUID,
+    work_start: str,
+    work_end: str,
+    slot_minutes: int,
+    start: datetime,
+    end: datetime,
+    tz: ZoneInfo,
+) -> list[dict]:
+    step = timedelta(minutes=slot_minutes)
+    opens, closes = _parse_hhmm(work_start), _parse_hhmm(work_end)
+    open_minutes = opens.hour * 60 + opens.minute
+    work_minutes = (closes.hour * 60 + closes.minute - open_minutes) % (24 * 60) or 24 * 60
+    offsets = [step * i for i in range(work_minutes // slot_minutes)]
+    available = SlotStatus.available
+    uuid4 = uuid.uuid4
+
+    rows: list[dict] = []
+    day = start.astimezone(tz).date() - timedelta(days=1)
+    last_day = end.astimezone(tz).date()
+    while day <= last_day:
+        day_open = datetime.combine(day, opens, tz).astimezone(timezone.utc)
+        rows.extend(
+            {
+                "id": uuid4(),
+                "place_id": place_id,
+                "start_time": slot_start,
+                "end_time": slot_start + step,
+                "status": available,
+                "generated": True,
+            }
+            for slot_start in (day_open + offset for offset in offsets)
+            if start <= slot_start < end
+        )
+        day += timedelta(days=1)
+    return rows
+
+
+async def materialize_slots(db: AsyncSession, schedules: list[Schedule], horizon_days: int | None = None) -> int:
+    if not schedules:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    until = now + timedelta(days=horizon_days or settings.SLOT_HORIZON_DAYS)
+    tz = ZoneInfo(settings.SLOT_TIMEZONE)
+
+    place_ids = [place_id for place_id, *_ in schedules]
+    rows: list[dict] = []
+    for place_id, work_start, work_end, slot_minutes in schedules:
+        rows.extend(expand_schedule(place_id, work_start, work_end, slot_minutes, now, until, tz))
+    wanted = {(row["place_id"], row["start_time"], row["end_time"]) for row in rows}
+
+    result = await db.execute(
+        select(
+            Slot.id,
+            Slot.place_id,
+            Slot.start_time,
+            Slot.end_time,
+            Slot.status,
+            Slot.generated,
+            exists().where(Booking.slot_id == Slot.id),
+        ).where(Slot.place_id.in_(place_ids), Slot.start_time >= now, Slot.start_time < until)
+    )
+    existing: set[tuple[UUID, datetime]] = set()
+    stale: list[UUID] = []
+    for slot_id, place_id, start_time, end_time, status, generated, has_bookings in result.all():
+        if (
+            generated
+            and status == SlotStatus.available
+            and not has_bookings
+            and (place_id, start_time, end_time) not in wanted
+        ):
+            stale.append(slot_id)
+        else:
+            existing.add((place_id, start_time))
+
+    for offset in range(0, len(stale), SLOT_INSERT_CHUNK):
+        await db.execute(delete(Slot).where(Slot.id.in_(stale[offset : offset + SLOT_INSERT_CHUNK])))
+
+    rows = [row for row in rows if (row["place_id"], row["start_time"]) not in existing]
+    inserted = 0
+    for offset in range(0, len(rows), SLOT_INSERT_CHUNK):
+        stmt = (
+            pg_insert(Slot)
+            .values(rows[offset : offset + SLOT_INSERT_CHUNK])
+            .on_conflict_do_nothing(constraint="uq_place_start_time")
+        )
+        result = await db.execute(stmt)
+        inserted += int(result.rowcount or 0)
+    return inserted
@@ -1,48 +1,153 @@
+import asyncio
 import json
+import logging
+import random
+import time
+from math import cos, floor, radians
 from typing import Any
 
 import httpx
+import numpy as np
 
 from app.core.config import settings
+from app.core.metrics import registry
+from app.services.geo_index import KM_PER_DEG_LAT, haversine_km_many
+from app.services.rate_limit import RateLimiter
 from app.services.redis_client import redis_call
 
+logger = logging.getLogger(__name__)
 
-async def _allow_twogis_call() -> bool:
-    key = "ratelimit:2gis:minute"
-    current = await redis_call("incr", key)
-    if current == 1:
-        await redis_call("expire", key, 60)
-    return current <= settings.TWOGIS_RPM_LIMIT
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RADIUS_BUCKETS_KM = (1, 2, 5, 10, 20)
+TILE_RADIUS_FACTOR = 1.75
+PAGE_SIZE = 50
 
-async def search_nearby(city: str, lat: float, lng: float, radius_km: float, category: str | None) -> list[dict[str, Any]]:
-    if not settings.TWOGIS_API_KEY:
-        return []
+_inflight: dict[str, asyncio.Task] = {}
 
-    cache_key = f"2gis:nearby:{city}:{lat:.4f}:{lng:.4f}:{radius_km}:{category or 'all'}"
-    cached = await redis_call("get", cache_key)
-    if cached:
-        return json.loads(cached)
+twogis_request_seconds = registry.histogram(
+    "twogis_request_duration_seconds", "2GIS upstream request latency per attempt.", ("outcome",)
+)
+twogis_cache_total = registry.counter("twogis_cache_lookups_total", "2GIS tile cache lookups.", ("result",))
+twogis_rate_limited_total = registry.counter("twogis_rate_limited_total", "2GIS fetches skipped by the rate limiter.")
 
-    if not await _allow_twogis_call():
-        return []
 
-    params = {
-        "q": category or "service",
-        "city": city,
-        "point": f"{lng},{lat}",
-        "radius": int(radius_km * 1000),
-        "fields": "items.point,items.address_name,items.reviews,items.rubrics,items.schedule",
-        "key": settings.TWOGIS_API_KEY,
-        "page_size": 50,
-    }
+class TwoGisClient:
+    def __init__(self) -> None:
+        self._client: httpx.AsyncClient | None = None
+        self.requests = 0
+        self.connections_opened = 0
+        self.retries = 0
+        self.errors = 0
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            http2=settings.TWOGIS_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.TWOGIS_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.TWOGIS_MAX_KEEPALIVE,
+                keepalive_expiry=settings.TWOGIS_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.TWOGIS_CONNECT_TIMEOUT,
+                read=settings.TWOGIS_READ_TIMEOUT,
+                write=settings.TWOGIS_WRITE_TIMEOUT,
+                pool=settings.TWOGIS_POOL_TIMEOUT,
+            ),
+        )
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.get(settings.TWOGIS_BASE_URL, params=params)
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _trace(self, event: str, _info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def get_json(self, params: dict[str, Any]) -> dict[str, Any]:
+        await self.start()
+        response = None
+        for attempt in range(settings.TWOGIS_RETRIES + 1):
+            if attempt:
+                self.retries += 1
+                delay = settings.TWOGIS_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))
+                await asyncio.sleep(delay + random.uniform(0, delay))
+            self.requests += 1
+            started = time.perf_counter()
+            try:
+                response = await self._client.get(settings.TWOGIS_BASE_URL, params=params, extensions={"trace": self._trace})
+            except httpx.TransportError:
+                twogis_request_seconds.observe(time.perf_counter() - started, "transport_error")
+                if attempt == settings.TWOGIS_RETRIES:
+                    self.errors += 1
+                    raise
+                continue
+            twogis_request_seconds.observe(time.perf_counter() - started, f"{response.status_code // 100}xx")
+            if response.status_code not in RETRY_STATUSES:
+                break
+
+        if response.is_error:
+            self.errors += 1
         response.raise_for_status()
-        payload = response.json()
+        return response.json()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(self.requests - self.connections_opened, 0),
+            "retries": self.retries,
+            "errors": self.errors,
+        }
+
+
+twogis_client = TwoGisClient()
+
+for _stat in ("requests", "connections_opened", "retries", "errors"):
+    registry.callback(
+        f"twogis_{_stat}_total",
+        f"2GIS client {_stat.replace('_', ' ')}.",
+        "counter",
+        (),
+        lambda stat=_stat: [((), twogis_client.stats()[stat])],
+    )
+
+
+twogis_limiter = RateLimiter("2gis", settings.TWOGIS_RPM_LIMIT, 60, burst=settings.TWOGIS_RATE_BURST)
+
+
+async def _allow_twogis_call() -> bool:
+    return await twogis_limiter.acquire(wait_ms=settings.TWOGIS_RATE_WAIT_MS)
+
+
+def _tile_size(bucket: int, row: int) -> tuple[float, float]:
+    lat_size = bucket / KM_PER_DEG_LAT
+    return lat_size, lat_size / cos(radians((row + 0.5) * lat_size))
+
+
+def _tile_for(lat: float, lng: float, radius_km: float) -> tuple[int, int, int]:
+    bucket = next((b for b in RADIUS_BUCKETS_KM if b >= radius_km), RADIUS_BUCKETS_KM[-1])
+    row = floor(lat / (bucket / KM_PER_DEG_LAT))
+    _lat_size, lng_size = _tile_size(bucket, row)
+    return bucket, row, floor(lng / lng_size)
+
 
-    items = payload.get("result", {}).get("items", [])
+def _within(items: list[dict[str, Any]], lat: float, lng: float, radius_km: float) -> list[dict[str, Any]]:
+    if not items:
+        return []
+    distances = haversine_km_many(
+        lat,
+        lng,
+        np.fromiter((item["lat"] for item in items), float, len(items)),
+        np.fromiter((item["lng"] for item in items), float, len(items)),
+    )
+    return [item for item, distance in zip(items, distances.tolist()) if distance <= radius_km]
+
+
+def _normalize(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
     normalized = []
     for item in items:
         point = item.get("point") or {}
@@ -58,6 +163,104 @@ async def search_nearby(city: str, lat: float, lng: float, radius_km: float, cat
                 "rating": ((item.get("reviews") or {}).get("general_rating")),
             }
         )
-
-    await redis_call("setex", cache_key, 120, json.dumps(normalized))
     return normalized
+
+
+async def _fetch_items(
+    city: str, lat: float, lng: float, radius_m: int, category: str | None, max_pages: int
+) -> tuple[list[dict[str, Any]], bool]:
+    params = {
+        "q": category or "service",
+        "city": city,
+        "point": f"{lng},{lat}",
+        "radius": min(radius_m, 40000),
+        "fields": "items.point,items.address_name,items.reviews,items.rubrics,items.schedule",
+        "key": settings.TWOGIS_API_KEY,
+        "page_size": PAGE_SIZE,
+    }
+    items: list[dict[str, Any]] = []
+    for page in range(1, max_pages + 1):
+        if page > 1 and not await _allow_twogis_call():
+            twogis_rate_limited_total.inc()
+            return items, False
+        result = (await twogis_client.get_json({**params, "page": page})).get("result", {})
+        batch = result.get("items", [])
+        items.extend(_normalize(batch))
+        total = result.get("total")
+        if len(batch) < PAGE_SIZE or (total is not None and page * PAGE_SIZE >= total):
+            return items, True
+    return items, False
+
+
+async def _fetch_tile(
+    cache_key: str, city: str, bucket: int, row: int, col: int, category: str | None
+) -> dict[str, Any] | None:
+    if not await _allow_twogis_call():
+        twogis_rate_limited_total.inc()
+        return None
+
+    lat_size, lng_size = _tile_size(bucket, row)
+    items, complete = await _fetch_items(
+        city,
+        (row + 0.5) * lat_size,
+        (col + 0.5) * lng_size,
+        int(bucket * TILE_RADIUS_FACTOR * 1000),
+        category,
+        settings.TWOGIS_TILE_MAX_PAGES,
+    )
+    entry = {"fetched_at": time.time(), "items": items, "complete": complete}
+    ttl = settings.TWOGIS_CACHE_TTL_SECONDS + settings.TWOGIS_CACHE_STALE_SECONDS
+    await redis_call("setex", cache_key, ttl, json.dumps(entry))
+    return entry
+
+
+async def _search_direct(
+    city: str, lat: float, lng: float, radius_km: float, category: str | None, fallback: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    if not await _allow_twogis_call():
+        twogis_rate_limited_total.inc()
+        return fallback
+    twogis_cache_total.inc("saturated")
+    items, _complete = await _fetch_items(city, lat, lng, int(radius_km * 1000), category, 1)
+    return items
+
+
+def _log_fetch_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("2GIS tile fetch failed", exc_info=task.exception())
+
+
+def _tile_task(cache_key: str, city: str, bucket: int, row: int, col: int, category: str | None) -> asyncio.Task:
+    task = _inflight.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_fetch_tile(cache_key, city, bucket, row, col, category))
+        _inflight[cache_key] = task
+        task.add_done_callback(lambda _t: _inflight.pop(cache_key, None))
+        task.add_done_callback(_log_fetch_error)
+    return task
+
+
+async def search_nearby(city: str, lat: float, lng: float, radius_km: float, category: str | None) -> list[dict[str, Any]]:
+    if not settings.TWOGIS_API_KEY:
+        return []
+
+    bucket, row, col = _tile_for(lat, lng, radius_km)
+    cache_key = f"2gis:tile:{city}:{bucket}:{row}:{col}:{category or 'all'}"
+    cached = await redis_call("get", cache_key)
+    if cached:
+        entry = json.loads(cached)
+        if time.time() - entry["fetched_at"] >= settings.TWOGIS_CACHE_TTL_SECONDS:
+            twogis_cache_total.inc("stale")
+            _tile_task(cache_key, city, bucket, row, col, category)
+        else:
+            twogis_cache_total.inc("hit")
+    else:
+        twogis_cache_total.inc("miss")
+        entry = await asyncio.shield(_tile_task(cache_key, city, bucket, row, col, category))
+        if entry is None:
+            return []
+
+    items = _within(entry["items"], lat, lng, radius_km)
+    if entry.get("complete", True):
+        return items
+    return _within(await _search_direct(city, lat, lng, radius_km, category, items), lat, lng, radius_km)
@@ -19,4 +19,8 @@ celery_app.conf.beat_schedule = {
         "task": "app.workers.tasks.reset_stale_live_status",
         "schedule": 7200,
     },
+    "materialize-slots-every-6h": {
+        "task": "app.workers.tasks.materialize_slots",
+        "schedule": 21600,
+    },
 }
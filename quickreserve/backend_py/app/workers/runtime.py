@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Coroutine
+from typing import Any
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+
+from app.core.metrics import TASK_BUCKETS, registry
+from app.db.session import dispose_engines, engines
+from app.services.redis_client import close_redis, redis_call, redis_pipeline
+
+logger = logging.getLogger(__name__)
+
+CELERY_METRICS_KEY = "metrics:celery:tasks"
+
+celery_task_seconds = registry.histogram(
+    "celery_task_duration_seconds", "Celery task run time reported by workers.", ("task",), TASK_BUCKETS, shared=True
+)
+
+
+class WorkerRuntime:
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.task_stats: dict[str, dict[str, float]] = {}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="worker-runtime", daemon=True)
+            thread.start()
+            self._loop, self._thread = loop, thread
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(dispose_engines(), loop).result(timeout=10)
+        except Exception:
+            logger.exception("Disposing the worker engine failed")
+        try:
+            asyncio.run_coroutine_threadsafe(close_redis(), loop).result(timeout=10)
+        except Exception:
+            logger.exception("Closing the worker Redis client failed")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        self.start()
+        name = coro.__qualname__
+        submitted = time.perf_counter()
+        started: list[float] = []
+
+        async def timed():
+            started.append(time.perf_counter())
+            return await coro
+
+        try:
+            return asyncio.run_coroutine_threadsafe(timed(), self._loop).result()
+        finally:
+            finished = time.perf_counter()
+            self._record(name, submitted, started[0] if started else finished, finished)
+
+    def _record(self, name: str, submitted: float, started: float, finished: float) -> None:
+        stats = self.task_stats.setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "overhead_seconds": 0.0})
+        duration = finished - started
+        stats["count"] += 1
+        stats["total_seconds"] += duration
+        stats["max_seconds"] = max(stats["max_seconds"], duration)
+        stats["overhead_seconds"] += started - submitted
+        logger.info("%s took %.4fs (submit overhead %.6fs)", name, duration, started - submitted)
+        self._publish(name, duration)
+
+    def _publish(self, name: str, duration: float) -> None:
+        if self._loop is None:
+            return
+        field = f"{name}|{celery_task_seconds.bucket_index(duration)}"
+
+        def build(pipe) -> None:
+            pipe.hincrby(CELERY_METRICS_KEY, field, 1)
+            pipe.hincrbyfloat(CELERY_METRICS_KEY, f"{name}|sum", duration)
+
+        asyncio.run_coroutine_threadsafe(redis_pipeline(build), self._loop)
+
+
+worker_runtime = WorkerRuntime()
+
+
+async def load_celery_metrics() -> None:
+    fields = await redis_call("hgetall", CELERY_METRICS_KEY)
+    counts: dict[str, list[int]] = {}
+    totals: dict[str, float] = {}
+    for field, value in fields.items():
+        task, _, slot = field.rpartition("|")
+        if slot == "sum":
+            totals[task] = float(value)
+        else:
+            counts.setdefault(task, [0] * (len(TASK_BUCKETS) + 1))[int(slot)] = int(value)
+    celery_task_seconds.clear()
+    for task, task_counts in counts.items():
+        celery_task_seconds.load((task,), task_counts, totals.get(task, 0.0))
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**_kwargs) -> None:
+    for engine in engines().values():
+        engine.sync_engine.dispose(close=False)
+    worker_runtime.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _on_worker_shutdown(**_kwargs) -> None:
+    worker_runtime.stop()
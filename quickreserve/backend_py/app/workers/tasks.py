@@ -1,62 +1,65 @@
-import asyncio
-import json
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import update
+from sqlalchemy import select
 
-from app.db.models import Slot, SlotStatus
+from app.core.config import settings
+from app.db.models import CompanyProfile
 from app.db.session import AsyncSessionLocal
-from app.services.redis_client import redis_call
+from app.services.holds import release_claims, release_expired_holds
+from app.services.live_status import reset_stale_statuses
+from app.services.slots import materialize_slots
 from app.workers.celery_app import celery_app
+from app.workers.runtime import worker_runtime
 
 
 async def _release_expired_pending_impl() -> int:
     async with AsyncSessionLocal() as db:
-        stmt = (
-            update(Slot)
-            .where(Slot.status == SlotStatus.pending)
-            .where(Slot.pending_until < datetime.now(timezone.utc))
-            .values(status=SlotStatus.available, pending_until=None)
-            .execution_options(synchronize_session=False)
-        )
-        result = await db.execute(stmt)
+        released = await release_expired_holds(db)
         await db.commit()
-        return int(result.rowcount or 0)
+    await release_claims(released)
+    return len(released)
 
 
 @celery_app.task(name="app.workers.tasks.release_expired_pending")
 def release_expired_pending() -> int:
-    return asyncio.run(_release_expired_pending_impl())
+    return worker_runtime.run(_release_expired_pending_impl())
 
 
 async def _reset_stale_live_status_impl() -> int:
-    keys = []
-    iterator = await redis_call("scan_iter", match="live:status:*")
-    async for key in iterator:
-        keys.append(key)
-
-    changed = 0
-    threshold = datetime.now(timezone.utc) - timedelta(hours=2)
-    for key in keys:
-        payload = await redis_call("get", key)
-        if not payload:
-            continue
-        parsed = json.loads(payload)
-        value = parsed.get("updated_at")
-        if not value:
-            continue
-        try:
-            updated_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except ValueError:
-            continue
-        if updated_at < threshold and parsed.get("status") == "free":
-            parsed["status"] = "unknown"
-            parsed["updated_at"] = datetime.now(timezone.utc).isoformat()
-            await redis_call("set", key, json.dumps(parsed))
-            changed += 1
-    return changed
+    return await reset_stale_statuses(datetime.now(timezone.utc) - timedelta(hours=2))
 
 
 @celery_app.task(name="app.workers.tasks.reset_stale_live_status")
 def reset_stale_live_status() -> int:
-    return asyncio.run(_reset_stale_live_status_impl())
+    return worker_runtime.run(_reset_stale_live_status_impl())
+
+
+async def _materialize_slots_impl() -> int:
+    inserted = 0
+    last_id = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            stmt = (
+                select(
+                    CompanyProfile.id,
+                    CompanyProfile.company_id,
+                    CompanyProfile.work_start,
+                    CompanyProfile.work_end,
+                    CompanyProfile.slot_duration_minutes,
+                )
+                .order_by(CompanyProfile.id)
+                .limit(settings.SLOT_MATERIALIZE_BATCH)
+            )
+            if last_id is not None:
+                stmt = stmt.where(CompanyProfile.id > last_id)
+            batch = (await db.execute(stmt)).all()
+            if not batch:
+                return inserted
+            inserted += await materialize_slots(db, [tuple(row[1:]) for row in batch])
+            await db.commit()
+            last_id = batch[-1].id
+
+
+@celery_app.task(name="app.workers.tasks.materialize_slots")
+def materialize_slots_task() -> int:
+    return worker_runtime.run(_materialize_slots_impl())
@@ -0,0 +1,94 @@
+"""Cost of the /metrics instrumentation on the hot paths.
+
+Runs each case with instrumentation on and with the observe calls stubbed out.
+Redis calls go through the in-memory fallback so network time does not hide the difference.
+
+    python -m benchmarks.bench_metrics_overhead --iterations 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.core import metrics
+from app.core.metrics import MetricsMiddleware, registry
+from app.services import redis_client
+from app.services.redis_client import redis_breaker, redis_call
+from benchmarks.common import measure, print_table
+
+
+def _app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/v1/ping/{item_id}")
+    async def ping(item_id: int) -> dict:
+        return {"id": item_id}
+
+    return app
+
+
+async def _request_cpu(requests: int, rounds: int = 5) -> dict[str, float]:
+    clients = {
+        name: httpx.AsyncClient(transport=httpx.ASGITransport(app=_app(instrumented)), base_url="http://bench")
+        for name, instrumented in (("without middleware", False), ("with middleware", True))
+    }
+    samples: dict[str, list[float]] = {name: [] for name in clients}
+    for name, client in clients.items():
+        for i in range(200):
+            await client.get(f"/v1/ping/{i}")
+    for _ in range(rounds):
+        for name, client in clients.items():
+            started = time.process_time()
+            for i in range(requests):
+                await client.get(f"/v1/ping/{i}")
+            samples[name].append((time.process_time() - started) / requests * 1e6)
+    for client in clients.values():
+        await client.aclose()
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+async def main(iterations: int) -> None:
+    redis_breaker.reset_seconds = 1e9
+    for _ in range(redis_breaker.failure_threshold):
+        redis_breaker.record_failure()
+    await redis_call("set", "bench:metrics", "x")
+
+    observe = redis_client.redis_command_seconds.observe
+    rows = {"redis_call get (instrumented)": await measure(lambda: redis_call("get", "bench:metrics"), iterations)}
+    redis_client.redis_command_seconds.observe = lambda *_args: None
+    rows["redis_call get (no metrics)"] = await measure(lambda: redis_call("get", "bench:metrics"), iterations)
+    redis_client.redis_command_seconds.observe = observe
+
+    histogram = metrics.Histogram("bench_seconds", "bench", ("route",))
+
+    async def observe_once():
+        histogram.observe(0.003, "/v1/ping")
+
+    rows["histogram.observe"] = await measure(observe_once, iterations)
+
+    for i in range(500):
+        histogram.observe(0.001 * i, f"/v1/route/{i % 50}")
+    registry.register(histogram)
+
+    async def render():
+        registry.render()
+
+    rows["registry.render"] = await measure(render, max(iterations // 100, 50))
+    print_table("metrics overhead", rows)
+
+    cpu = await _request_cpu(max(iterations // 20, 500))
+    print()
+    for name, value in cpu.items():
+        print(f"request CPU {name:<28} {value:>10.1f} us (median of 5 rounds)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,59 @@
+"""Compare InMemoryRedis throughput with the real Redis client.
+
+    python -m benchmarks.bench_redis_fallback --iterations 20000
+"""
+
+import argparse
+import asyncio
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.services.redis_client import InMemoryRedis
+from benchmarks.common import measure, print_table
+
+
+async def _bench_client(client, iterations: int) -> dict[str, dict[str, float]]:
+    keys = [f"bench:key:{i}" for i in range(100)]
+    for key in keys:
+        await client.setex(key, 300, "x" * 64)
+    await client.hset("bench:hash", mapping={f"g{i}": "free" for i in range(1000)})
+    fields = [f"g{i}" for i in range(0, 1000, 10)]
+
+    async def pipeline():
+        pipe = client.pipeline(transaction=False)
+        for key in keys[:10]:
+            pipe.set(key, "y")
+        await pipe.execute()
+
+    return {
+        "get": await measure(lambda: client.get(keys[0]), iterations),
+        "setex": await measure(lambda: client.setex(keys[1], 300, "x" * 64), iterations),
+        "mget x100": await measure(lambda: client.mget(keys), iterations),
+        "hmget x100": await measure(lambda: client.hmget("bench:hash", fields), iterations),
+        "pipeline set x10": await measure(pipeline, iterations),
+    }
+
+
+async def main(iterations: int) -> None:
+    memory = InMemoryRedis(max_keys=settings.REDIS_FALLBACK_MAX_KEYS, max_bytes=settings.REDIS_FALLBACK_MAX_BYTES)
+    print_table("InMemoryRedis", await _bench_client(memory, iterations))
+
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=0.5)
+    try:
+        await client.ping()
+    except (redis.ConnectionError, OSError):
+        print(f"\nRedis at {settings.REDIS_URL} is not reachable, skipping the real client")
+        return
+    try:
+        print_table(f"redis.asyncio ({settings.REDIS_URL})", await _bench_client(client, iterations))
+    finally:
+        await client.delete(*[f"bench:key:{i}" for i in range(100)], "bench:hash")
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
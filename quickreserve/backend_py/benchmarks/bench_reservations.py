@@ -0,0 +1,93 @@
+"""Reservation throughput under contention (needs DATABASE_URL to point at Postgres).
+
+The hot-slot case runs with RESERVE_ADMISSION_GATE off and on and reports pool checkouts and SQL
+statements per attempt, i.e. how much of the losing traffic still reaches Postgres.
+
+    python -m benchmarks.bench_reservations --contenders 50 --rounds 40
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, db_query_seconds, dispose_engines, get_engine
+from app.services.booking import reserve_slot_atomic, reserve_slots_atomic
+from benchmarks.fixtures import create_place, create_schema, drop_place
+
+
+async def _attempt(slot_id, client_id) -> bool:
+    async with AsyncSessionLocal() as db:
+        return await reserve_slot_atomic(db, slot_id=slot_id, client_id=client_id) is not None
+
+
+async def _attempt_batch(slot_ids, client_id) -> bool:
+    async with AsyncSessionLocal() as db:
+        return await reserve_slots_atomic(db, slot_ids=slot_ids, client_id=client_id) is not None
+
+
+def _db_load() -> tuple[int, float]:
+    statements = sum(value for name, _labels, value in db_query_seconds.samples() if name.endswith("_count"))
+    return get_engine().sync_engine.pool.checkouts, statements
+
+
+def _report(name: str, attempts: int, successes: int, elapsed: float, load_before: tuple[int, float]) -> None:
+    checkouts, statements = (after - before for after, before in zip(_db_load(), load_before))
+    print(
+        f"{name:<28} attempts={attempts:<6} ok={successes:<6} "
+        f"attempts/s={attempts / elapsed:>9.0f} reservations/s={successes / elapsed:>9.0f} "
+        f"checkouts/attempt={checkouts / attempts:>5.2f} statements/attempt={statements / attempts:>5.2f}"
+    )
+
+
+async def _hot_slot(contenders: int, rounds: int, gate: bool) -> None:
+    settings.RESERVE_ADMISSION_GATE = gate
+    place_id, client_id, slot_ids = await create_place(rounds)
+    load_before = _db_load()
+    started = time.perf_counter()
+    successes = 0
+    for slot_id in slot_ids:
+        results = await asyncio.gather(*[_attempt(slot_id, client_id) for _ in range(contenders)])
+        successes += sum(results)
+    name = f"hot slot, gate {'on' if gate else 'off'}"
+    _report(name, contenders * rounds, successes, time.perf_counter() - started, load_before)
+    await drop_place(place_id, client_id)
+
+
+async def main(contenders: int, rounds: int) -> None:
+    await create_schema()
+    gate = settings.RESERVE_ADMISSION_GATE
+
+    await _hot_slot(contenders, rounds, gate=False)
+    await _hot_slot(contenders, rounds, gate=True)
+    settings.RESERVE_ADMISSION_GATE = gate
+
+    place_id, client_id, slot_ids = await create_place(contenders * rounds)
+    load_before = _db_load()
+    started = time.perf_counter()
+    successes = 0
+    for r in range(rounds):
+        chunk = slot_ids[r * contenders : (r + 1) * contenders]
+        successes += sum(await asyncio.gather(*[_attempt(slot_id, client_id) for slot_id in chunk]))
+    _report("many slots", contenders * rounds, successes, time.perf_counter() - started, load_before)
+    await drop_place(place_id, client_id)
+
+    place_id, client_id, slot_ids = await create_place(rounds * 3)
+    load_before = _db_load()
+    started = time.perf_counter()
+    successes = 0
+    for r in range(rounds):
+        triple = slot_ids[r * 3 : r * 3 + 3]
+        successes += sum(await asyncio.gather(*[_attempt_batch(triple, client_id) for _ in range(contenders)]))
+    _report("hot batch of 3 slots", contenders * rounds, successes, time.perf_counter() - started, load_before)
+    await drop_place(place_id, client_id)
+
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contenders", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.contenders, args.rounds))
@@ -0,0 +1,105 @@
+"""Per-request CPU for 500-item list responses: untyped dicts vs typed models, json vs orjson.
+
+    python -m benchmarks.bench_serialization --items 500 --requests 300
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.schemas.business import BusinessBookingPageOut
+from app.schemas.client import NearbyPageOut, SlotPageOut
+
+
+def _payloads(count: int) -> dict[str, dict]:
+    now = datetime.now(UTC).replace(microsecond=0)
+    slots = [
+        {"id": uuid.uuid4(), "start_time": now + timedelta(minutes=30 * i), "end_time": now + timedelta(minutes=30 * i + 30), "status": "available"}
+        for i in range(count)
+    ]
+    bookings = [
+        {"booking_id": uuid.uuid4(), "slot_id": slot["id"], "status": "pending", "start_time": slot["start_time"], "end_time": slot["end_time"]}
+        for slot in slots
+    ]
+    places = [
+        {
+            "id": str(uuid.uuid4()),
+            "gis_id": f"7012345678{i:06d}",
+            "name": f"Place {i}",
+            "address": f"Abay avenue {i}",
+            "lat": 43.238949 + i * 1e-4,
+            "lng": 76.889709 + i * 1e-4,
+            "rating": 4.5,
+            "distance_km": round(i * 0.01, 3),
+            "live_status": "free",
+            "source": "local",
+            "can_book": True,
+        }
+        for i in range(count)
+    ]
+    return {
+        "nearby": {"items": places, "total": count},
+        "slots": {"items": slots, "next_cursor": None},
+        "bookings": {"items": bookings, "next_cursor": None},
+    }
+
+
+def _untyped(page: dict) -> dict:
+    return {
+        **page,
+        "items": [{k: str(v) if isinstance(v, uuid.UUID) else v for k, v in item.items()} for item in page["items"]],
+    }
+
+
+def _endpoint(body: dict):
+    async def endpoint():
+        return body
+
+    return endpoint
+
+
+def _app(payloads: dict[str, dict]) -> FastAPI:
+    models = {"nearby": NearbyPageOut, "slots": SlotPageOut, "bookings": BusinessBookingPageOut}
+    variants = {
+        "untyped+json": (None, JSONResponse, _untyped),
+        "typed+json": (True, JSONResponse, dict),
+        "typed+orjson": (True, ORJSONResponse, dict),
+    }
+    app = FastAPI()
+    for name, page in payloads.items():
+        for variant, (typed, response_class, prepare) in variants.items():
+            app.add_api_route(
+                f"/{name}/{variant}",
+                _endpoint(prepare(page)),
+                response_model=models[name] if typed else None,
+                response_class=response_class,
+            )
+    return app
+
+
+async def main(items: int, requests: int) -> None:
+    app = _app(_payloads(items))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        print(f"{'route':<36} {'cpu ms/req':>12} {'bytes':>10}")
+        for path in [route.path for route in app.routes if "+" in route.path]:
+            for _ in range(20):
+                await client.get(path)
+            started = time.process_time()
+            for _ in range(requests):
+                response = await client.get(path)
+            cpu_ms = (time.process_time() - started) / requests * 1e3
+            print(f"{path:<36} {cpu_ms:>12.2f} {len(response.content):>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.requests))
@@ -0,0 +1,74 @@
+"""Emit cost for city rooms vs viewport tile rooms with simulated subscribers.
+
+    python -m benchmarks.bench_socket_fanout --subscribers 10000 --events 200
+"""
+
+import argparse
+import asyncio
+import random
+
+from app.core import sockets
+from benchmarks.common import measure, print_table
+
+CITY = "Almaty"
+SOUTH, NORTH, WEST, EAST = 43.15, 43.35, 76.80, 77.05
+VIEWPORT_DEG = 0.02
+
+
+async def _subscribe(count: int, viewport: bool) -> list[str]:
+    rng = random.Random(7)
+    sids = []
+    for i in range(count):
+        sid = await sockets.sio.manager.connect(f"eio-{viewport}-{i}", "/")
+        if viewport:
+            lat = rng.uniform(SOUTH, NORTH - VIEWPORT_DEG)
+            lng = rng.uniform(WEST, EAST - VIEWPORT_DEG)
+            await sockets.subscribe_viewport(
+                sid, {"city": CITY, "south": lat, "west": lng, "north": lat + VIEWPORT_DEG, "east": lng + VIEWPORT_DEG}
+            )
+        else:
+            await sockets.subscribe_city(sid, {"city": CITY})
+        sids.append(sid)
+    return sids
+
+
+async def main(subscribers: int, events: int) -> None:
+    delivered = 0
+
+    async def send(_eio_sid, _pkt):
+        nonlocal delivered
+        delivered += 1
+
+    sockets.sio._send_eio_packet = send
+    rng = random.Random(11)
+    places = [(rng.uniform(SOUTH, NORTH), rng.uniform(WEST, EAST)) for _ in range(events)]
+    payload = {"items": [{"gis_id": "bench", "status": "busy"}]}
+    rows: dict[str, dict[str, float]] = {}
+    fanout: dict[str, float] = {}
+
+    for name, viewport in (("city room", False), ("viewport tiles", True)):
+        sids = await _subscribe(subscribers, viewport)
+        places_iter = iter(places * 2)
+
+        async def emit():
+            lat, lng = next(places_iter)
+            rooms = sockets.place_rooms(CITY, lat, lng) if viewport else [f"city:{CITY}"]
+            await sockets.sio.emit("live_status_batch", payload, to=rooms)
+
+        delivered = 0
+        rows[name] = await measure(emit, events)
+        fanout[name] = delivered / events
+        for sid in sids:
+            await sockets.sio.manager.disconnect(sid, "/")
+
+    print_table(f"emit cost, {subscribers} subscribers", rows)
+    for name, value in fanout.items():
+        print(f"{name:<40} recipients/event={value:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.subscribers, args.events))
@@ -0,0 +1,90 @@
+"""API worker boot time: import cost, time to first healthy response and what startup touches.
+
+Every case runs in a fresh interpreter. The migration case times `python -m app.db.migrate` against an
+existing schema, i.e. the create_all check that used to run on every boot (needs Postgres).
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import app.main
+print((time.perf_counter() - started) * 1000)
+"""
+
+SIDE_EFFECTS_SNIPPET = """
+import asyncio, json
+from app.main import app
+from app.db.session import engines
+from app.services import redis_client
+
+async def main():
+    seen = {"engines_after_import": len(engines()), "redis_client_after_import": redis_client._redis_client is not None}
+    async with app.router.lifespan_context(app):
+        await asyncio.sleep(0.2)
+        seen["engines_after_startup"] = len(engines())
+        seen["redis_client_after_startup"] = redis_client._redis_client is not None
+        seen["db_connections_after_startup"] = sum(engine.sync_engine.pool.checkedin() for engine in engines().values())
+    print(json.dumps(seen))
+
+asyncio.run(main())
+"""
+
+
+def _python(snippet: str) -> str:
+    return subprocess.run([sys.executable, "-c", snippet], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _time_command(args: list[str]) -> float:
+    started = time.perf_counter()
+    subprocess.run(args, check=True, capture_output=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def _time_to_healthy(port: int) -> float:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:socket_app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=15)
+
+
+def _report(name: str, samples: list[float]) -> None:
+    print(f"{name:<32} median={statistics.median(samples):>8.1f} ms  min={min(samples):>8.1f} ms  max={max(samples):>8.1f} ms")
+
+
+def main(runs: int, port: int) -> None:
+    _report("import app.main", [float(_python(IMPORT_SNIPPET)) for _ in range(runs)])
+    _report("uvicorn spawn -> /health 200", [_time_to_healthy(port) for _ in range(runs)])
+    _report("python -m app.db.migrate", [_time_command([sys.executable, "-m", "app.db.migrate"]) for _ in range(runs)])
+    for key, value in json.loads(_python(SIDE_EFFECTS_SNIPPET)).items():
+        print(f"{key:<32} {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18910)
+    args = parser.parse_args()
+    main(args.runs, args.port)
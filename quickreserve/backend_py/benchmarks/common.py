@@ -0,0 +1,34 @@
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure(fn: Callable[[], Awaitable], iterations: int) -> dict[str, float]:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    return {
+        "ops_per_sec": iterations / elapsed if elapsed else 0.0,
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+        "mean_us": statistics.fmean(latencies) * 1e6,
+    }
+
+
+def print_table(title: str, rows: dict[str, dict[str, float]]) -> None:
+    print(f"\n{title}")
+    print(f"{'case':<40} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10}")
+    for name, row in rows.items():
+        print(f"{name:<40} {row['ops_per_sec']:>12.0f} {row['p50_us']:>10.1f} {row['p99_us']:>10.1f}")
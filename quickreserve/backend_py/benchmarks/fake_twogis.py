@@ -0,0 +1,79 @@
+"""Local stand-in for the 2GIS catalog API used by the load suite.
+
+    python -m benchmarks.fake_twogis --port 18081 --latency-ms 40
+    TWOGIS_BASE_URL=http://127.0.0.1:18081/3.0/items TWOGIS_API_KEY=bench uvicorn app.main:socket_app
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app.services.geo_index import KM_PER_DEG_LAT
+
+
+class FakeTwoGisServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, latency_ms: float = 40.0, page_size: int = 50, total: int | None = None) -> None:
+        super().__init__(("127.0.0.1", port), FakeTwoGisHandler)
+        self.latency_ms = latency_ms
+        self.page_size = page_size
+        self.total = total or page_size
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/3.0/items"
+
+    def start(self) -> "FakeTwoGisServer":
+        threading.Thread(target=self.serve_forever, name="fake-2gis", daemon=True).start()
+        return self
+
+
+class FakeTwoGisHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeTwoGisServer
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        lng, lat = (float(part) for part in params.get("point", "76.889709,43.238949").split(","))
+        radius_deg = int(params.get("radius", 5000)) / 1000 / KM_PER_DEG_LAT
+        page = int(params.get("page", 1))
+        page_size = min(int(params.get("page_size", self.server.page_size)), self.server.page_size)
+        rng = random.Random(f"{params.get('point')}:{params.get('q')}:{page}")
+        items = [
+            {
+                "id": f"70000{rng.randrange(10**11):011d}",
+                "name": f"{params.get('q', 'service')} {i}",
+                "address_name": f"Street {rng.randint(1, 300)}",
+                "point": {"lat": lat + rng.uniform(-radius_deg, radius_deg), "lon": lng + rng.uniform(-radius_deg, radius_deg)},
+                "reviews": {"general_rating": round(rng.uniform(3, 5), 1)},
+            }
+            for i in range(max(min(page_size, self.server.total - (page - 1) * page_size), 0))
+        ]
+        time.sleep(self.server.latency_ms / 1000)
+        body = json.dumps({"result": {"items": items, "total": self.server.total}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--total", type=int, default=None)
+    args = parser.parse_args()
+    server = FakeTwoGisServer(args.port, args.latency_ms, total=args.total)
+    print(f"fake 2GIS listening on {server.url}")
+    server.serve_forever()
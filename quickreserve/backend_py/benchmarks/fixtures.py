@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+
+from app.db.base import Base
+from app.db.models import Category, Organization, Slot, SlotStatus, User, UserRole
+from app.db.session import AsyncSessionLocal, get_engine
+
+
+async def create_schema() -> None:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def create_place(slot_count: int, city: str = "bench", lat: float = 43.238949, lng: float = 76.889709):
+    start = datetime.now(timezone.utc).replace(second=0, microsecond=0) + timedelta(days=1)
+    async with AsyncSessionLocal() as db:
+        org = Organization(
+            gis_id=f"bench-{uuid.uuid4()}",
+            name="Bench place",
+            city=city,
+            category=Category.barbershop,
+            lat=lat,
+            lng=lng,
+        )
+        client = User(phone=f"bench-{uuid.uuid4().hex[:20]}", name="Bench client", role=UserRole.client)
+        db.add_all([org, client])
+        await db.flush()
+        slots = [
+            Slot(
+                place_id=org.id,
+                start_time=start + timedelta(minutes=15 * i),
+                end_time=start + timedelta(minutes=15 * (i + 1)),
+                status=SlotStatus.available,
+            )
+            for i in range(slot_count)
+        ]
+        db.add_all(slots)
+        await db.commit()
+        return org.id, client.id, [slot.id for slot in slots]
+
+
+async def drop_place(place_id: uuid.UUID, client_id: uuid.UUID) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Organization).where(Organization.id == place_id))
+        await db.execute(delete(User).where(User.id == client_id))
+        await db.commit()
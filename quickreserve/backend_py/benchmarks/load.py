@@ -0,0 +1,418 @@
+"""End-to-end load scenarios against the real socket_app with local stand-ins.
+
+Starts the fake 2GIS server and `uvicorn app.main:socket_app` in a subprocess, then drives HTTP
+and Socket.IO traffic at it. DATABASE_URL must point at a local Postgres. REDIS_URL is used when
+reachable, otherwise the server runs on the in-memory fallback.
+
+    python -m benchmarks.load                              # every scenario, compared with baseline.json
+    python -m benchmarks.load --scenario nearby --scenario reserve
+    python -m benchmarks.load --save-baseline              # store the current numbers as the baseline
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import httpx
+import websockets
+from sqlalchemy import func, insert, literal, select, update
+
+from app.db.models import Booking, BookingStatus, Slot, SlotStatus
+from app.db.session import AsyncSessionLocal, dispose_engines
+from app.services.live_status import reset_stale_statuses, set_live_status
+from app.workers.tasks import _release_expired_pending_impl
+from benchmarks.common import percentile
+from benchmarks.fake_twogis import FakeTwoGisServer
+from benchmarks.fixtures import create_place, create_schema, drop_place
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+CENTER_LAT, CENTER_LNG = 43.238949, 76.889709
+SCENARIOS = ("nearby", "reserve", "status_storm", "jobs")
+
+
+def _summary(latencies: list[float], elapsed: float, **extra) -> dict:
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        **extra,
+    }
+
+
+async def _drive(call: Callable[[int], Awaitable], total: int, concurrency: int) -> tuple[list[float], float]:
+    latencies: list[float] = []
+    counter = itertools.count()
+
+    async def worker() -> None:
+        while (i := next(counter)) < total:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, time.perf_counter() - started
+
+
+def _jitter(rng: random.Random, sigma_deg: float = 0.01) -> tuple[float, float]:
+    return CENTER_LAT + rng.gauss(0, sigma_deg), CENTER_LNG + rng.gauss(0, sigma_deg)
+
+
+async def _token(http: httpx.AsyncClient, role: str) -> str:
+    response = await http.post(
+        "/v1/auth/mock-token", params={"phone": f"load-{uuid.uuid4().hex[:16]}", "name": "load", "role": role}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _register_places(
+    http: httpx.AsyncClient, city: str, count: int, concurrency: int
+) -> tuple[list[str], dict[str, str]]:
+    headers = {"Authorization": f"Bearer {await _token(http, 'business')}"}
+    rng = random.Random(city)
+    gis_ids = [f"load-{uuid.uuid4().hex}" for _ in range(count)]
+
+    async def register(i: int) -> None:
+        lat, lng = _jitter(rng, 0.02)
+        response = await http.post(
+            "/v1/business/register",
+            json={"gis_id": gis_ids[i], "name": f"Load {i}", "city": city, "category": "barbershop", "lat": lat, "lng": lng},
+            headers=headers,
+        )
+        response.raise_for_status()
+
+    await _drive(register, count, concurrency)
+    return gis_ids, headers
+
+
+class Server:
+    def __init__(self, port: int, env: dict[str, str]) -> None:
+        self.port = port
+        self.env = env
+        self.process: subprocess.Popen | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def __aenter__(self) -> "Server":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:socket_app", "--port", str(self.port), "--log-level", "warning"],
+            env={**os.environ, **self.env},
+        )
+        async with httpx.AsyncClient(base_url=self.url) as http:
+            for _ in range(300):
+                if self.process.poll() is not None:
+                    raise RuntimeError("API server exited during startup")
+                try:
+                    if (await http.get("/health")).status_code == 200:
+                        return self
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise RuntimeError("API server did not become healthy")
+
+    async def __aexit__(self, *_exc) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class Subscriber:
+    def __init__(self, stats: dict) -> None:
+        self.stats = stats
+        self._ws = None
+        self._reader: asyncio.Task | None = None
+
+    async def connect(self, ws_url: str, city: str) -> None:
+        self._ws = await websockets.connect(f"{ws_url}/socket.io/?EIO=4&transport=websocket", max_queue=None)
+        await self._ws.recv()
+        await self._ws.send("40")
+        await self._ws.recv()
+        await self._ws.send("420" + json.dumps(["subscribe_city", {"city": city}]))
+        while not (await self._ws.recv()).startswith("430"):
+            pass
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        async for message in self._ws:
+            if message == "2":
+                await self._ws.send("3")
+            elif message.startswith("42"):
+                _event, data = json.loads(message[2:])
+                self.stats["frames"] += 1
+                self.stats["items"] += len(data.get("items", [data]))
+                self.stats["last_at"] = time.perf_counter()
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._ws is not None:
+            await self._ws.close()
+
+
+async def scenario_nearby(http: httpx.AsyncClient, args: argparse.Namespace, _server: Server) -> dict:
+    city = f"load-{uuid.uuid4().hex[:8]}"
+    await _register_places(http, city, args.places, args.concurrency)
+    rng = random.Random(7)
+
+    async def call(_i: int) -> None:
+        lat, lng = _jitter(rng)
+        response = await http.get(
+            "/v1/client/map/nearby",
+            params={"lat": lat, "lng": lng, "city": city, "radius_km": rng.choice((1, 2, 5)), "limit": 100},
+        )
+        response.raise_for_status()
+
+    return _summary(*await _drive(call, args.requests, args.concurrency))
+
+
+async def scenario_reserve(http: httpx.AsyncClient, args: argparse.Namespace, _server: Server) -> dict:
+    response = await http.post(
+        "/companies",
+        json={
+            "name": "Load company",
+            "category": "barbershop",
+            "address": "Load street 1",
+            "phone": "+77000000000",
+            "work_start": "00:00",
+            "work_end": "23:30",
+            "slot_duration_minutes": 30,
+        },
+    )
+    response.raise_for_status()
+    company_id = response.json()["id"]
+    response = await http.get(f"/v1/client/place/{company_id}/slots", params={"limit": 200})
+    response.raise_for_status()
+    slots = response.json()["items"]
+    tokens = [await _token(http, "client") for _ in range(args.contenders)]
+
+    latencies: list[float] = []
+    winners_max = reservations = errors = 0
+
+    async def attempt(slot_id: str, token: str) -> bool:
+        nonlocal errors
+        started = time.perf_counter()
+        response = await http.post(
+            "/v1/client/booking/reserve", json={"slot_id": slot_id}, headers={"Authorization": f"Bearer {token}"}
+        )
+        latencies.append(time.perf_counter() - started)
+        if response.status_code not in (200, 409):
+            errors += 1
+        return response.status_code == 200
+
+    started = time.perf_counter()
+    for slot in slots[: args.rounds]:
+        winners = sum(await asyncio.gather(*[attempt(slot["id"], token) for token in tokens]))
+        winners_max = max(winners_max, winners)
+        reservations += winners
+    return _summary(
+        latencies,
+        time.perf_counter() - started,
+        reservations=reservations,
+        winners_per_slot_max=winners_max,
+        errors=errors,
+    )
+
+
+async def scenario_status_storm(http: httpx.AsyncClient, args: argparse.Namespace, server: Server) -> dict:
+    city = f"load-{uuid.uuid4().hex[:8]}"
+    gis_ids, headers = await _register_places(http, city, args.storm_places, args.concurrency)
+    stats = {"frames": 0, "items": 0, "last_at": 0.0}
+    subscribers = [Subscriber(stats) for _ in range(args.subscribers)]
+    ws_url = server.url.replace("http://", "ws://")
+    connect_started = time.perf_counter()
+    for i in range(0, len(subscribers), 200):
+        await asyncio.gather(*[subscriber.connect(ws_url, city) for subscriber in subscribers[i : i + 200]])
+    connect_seconds = time.perf_counter() - connect_started
+
+    rng = random.Random(11)
+
+    async def change(_i: int) -> None:
+        response = await http.patch(
+            "/v1/business/status",
+            json={"gis_id": rng.choice(gis_ids), "city": city, "status": rng.choice(("free", "busy"))},
+            headers=headers,
+        )
+        response.raise_for_status()
+
+    latencies, elapsed = await _drive(change, args.updates, args.concurrency)
+    sent_at = time.perf_counter()
+    quiet_since = time.perf_counter()
+    seen = stats["frames"]
+    while time.perf_counter() - quiet_since < 1.0 and time.perf_counter() - sent_at < 30:
+        await asyncio.sleep(0.1)
+        if stats["frames"] != seen:
+            seen, quiet_since = stats["frames"], time.perf_counter()
+    await asyncio.gather(*[subscriber.close() for subscriber in subscribers])
+    return _summary(
+        latencies,
+        elapsed,
+        subscribers=args.subscribers,
+        connect_ms=round(connect_seconds * 1000, 1),
+        frames_delivered=stats["frames"],
+        items_delivered=stats["items"],
+        drain_ms=round(max(stats["last_at"] - sent_at, 0.0) * 1000, 1),
+    )
+
+
+async def scenario_jobs(_http: httpx.AsyncClient, args: argparse.Namespace, _server: Server) -> dict:
+    place_id, client_id, _slot_ids = await create_place(args.job_rows)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Slot)
+            .where(Slot.place_id == place_id)
+            .values(status=SlotStatus.pending, pending_until=datetime.now(UTC) - timedelta(minutes=1))
+        )
+        await db.execute(
+            insert(Booking).from_select(
+                ["id", "slot_id", "client_id", "status", "created_at"],
+                select(
+                    func.gen_random_uuid(),
+                    Slot.id,
+                    literal(client_id),
+                    literal(BookingStatus.pending, Booking.status.type),
+                    func.now(),
+                ).where(Slot.place_id == place_id),
+            )
+        )
+        await db.commit()
+
+    started = time.perf_counter()
+    released = await _release_expired_pending_impl()
+    release_seconds = time.perf_counter() - started
+    await drop_place(place_id, client_id)
+
+    city = f"load-{uuid.uuid4().hex[:8]}"
+    for start in range(0, args.job_rows, 500):
+        chunk = range(start, min(start + 500, args.job_rows))
+        await asyncio.gather(*[set_live_status(f"{city}-{i}", "free", city) for i in chunk])
+    started = time.perf_counter()
+    reset = await reset_stale_statuses(datetime.now(UTC) + timedelta(seconds=1))
+    reset_seconds = time.perf_counter() - started
+    await dispose_engines()
+
+    return {
+        "release_rows": released,
+        "release_ms": round(release_seconds * 1000, 1),
+        "release_rows_per_sec": round(released / release_seconds, 1) if release_seconds else 0.0,
+        "reset_rows": reset,
+        "reset_ms": round(reset_seconds * 1000, 1),
+        "reset_rows_per_sec": round(reset / reset_seconds, 1) if reset_seconds else 0.0,
+    }
+
+
+RUNNERS = {
+    "nearby": scenario_nearby,
+    "reserve": scenario_reserve,
+    "status_storm": scenario_status_storm,
+    "jobs": scenario_jobs,
+}
+
+
+def _direction(metric: str) -> int:
+    if metric.endswith("_ms"):
+        return -1
+    if metric == "rps" or metric.endswith("_per_sec"):
+        return 1
+    return 0
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    print(f"\n{'scenario.metric':<42} {'baseline':>12} {'current':>12} {'delta':>9}")
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(scenario, {}).get(metric)
+            direction = _direction(metric)
+            if base is None or not direction or not base:
+                continue
+            delta = (value - base) / base
+            regressed = delta * direction < -tolerance
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{scenario + '.' + metric:<42} {base:>12} {value:>12} {delta:>+8.1%}{flag}")
+            if regressed:
+                regressions.append(f"{scenario}.{metric}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    scenarios = args.scenario or list(SCENARIOS)
+    await create_schema()
+    twogis = FakeTwoGisServer(args.twogis_port, args.twogis_latency_ms).start()
+    env = {
+        "TWOGIS_BASE_URL": twogis.url,
+        "TWOGIS_API_KEY": "bench",
+        "TWOGIS_RPM_LIMIT": "100000",
+        "TWOGIS_RATE_BURST": "1000",
+    }
+    results: dict[str, dict] = {}
+    async with Server(args.port, env) as server:
+        limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+        async with httpx.AsyncClient(base_url=server.url, limits=limits, timeout=60) as http:
+            for name in scenarios:
+                results[name] = await RUNNERS[name](http, args, server)
+                print(f"{name:<14} {json.dumps(results[name])}")
+    results.setdefault("nearby", {})
+    results["nearby"]["upstream_calls"] = twogis.requests
+    twogis.shutdown()
+    results = {name: metrics for name, metrics in results.items() if name in scenarios}
+
+    reserve = results.get("reserve")
+    if reserve is not None:
+        if reserve["winners_per_slot_max"] > 1:
+            print("\nreserve: more than one client won the same slot")
+            return 1
+        if reserve["errors"]:
+            print(f"\nreserve: {reserve['errors']} request(s) failed with a status other than 200/409")
+            return 1
+        if not reserve["reservations"]:
+            print("\nreserve: no reservation succeeded")
+            return 1
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline written to {BASELINE_PATH}")
+        return 0
+    if not BASELINE_PATH.exists():
+        print("\nno baseline stored; run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, json.loads(BASELINE_PATH.read_text()), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--places", type=int, default=300)
+    parser.add_argument("--contenders", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=40)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--storm-places", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--job-rows", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=18900)
+    parser.add_argument("--twogis-port", type=int, default=18901)
+    parser.add_argument("--twogis-latency-ms", type=float, default=40.0)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--save-baseline", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))